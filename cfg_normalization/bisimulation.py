@@ -1,60 +1,79 @@
-from collections import defaultdict
-
-from cfg import CFGrammar, Rule, Terminal
+from cfg import CFGrammar, Rule, RuleStore, Terminal
 
 
 class Bisimulation:
+    # Nonterminals are split into classes by their signatures: sets of right sides
+    # of their rules, where a terminal is encoded by a negative number and
+    # a nonterminal by its class. After a class splits, only nonterminals
+    # with rules mentioning the moved ones get new signatures.
     def __init__(self, cfg):
         self.cfg = cfg
         self.nonterminal_classes = {nt: 0 for nt in cfg.nonterminals}
-        self.rules_by_nts = self._get_rules_by_nts()
+        self.classes = {0: set(cfg.nonterminals)}
+        self.signatures = {}
+        self.predecessors = self._get_predecessors()
 
-    def _get_rules_by_nts(self):
-        rules_by_nts = defaultdict(list)
+    def _get_predecessors(self):
+        predecessors = {nt: set() for nt in self.cfg.nonterminals}
         for rule in self.cfg.rules:
-            rules_by_nts[rule.left].append(rule)
-        
-        return rules_by_nts
-
-    def _get_terminal_forms(self):
-        forms_to_nonterminals = defaultdict(list)
-        
-        for nonterminal in self.cfg.nonterminals:
-            terminal_forms = set()
-            for rule in self.rules_by_nts[nonterminal]:
-                terminal_form = ''
-                for sym in rule.right:
-                    if isinstance(sym, Terminal):
-                        terminal_form += sym.symbol
-                    else:
-                        terminal_form += str(self.nonterminal_classes[sym])
-                terminal_forms.add(terminal_form)
-            forms_to_nonterminals[tuple(terminal_forms)].append(nonterminal)
-        
-        return forms_to_nonterminals
-
-    def _update_classes(self, forms_to_nonterminals):
-        class_num = 0
-        updated = False
-        for nonterminals in forms_to_nonterminals.values():
+            for sym in rule.right:
+                if not isinstance(sym, Terminal):
+                    predecessors[sym].add(rule.left)
+
+        return predecessors
+
+    def _get_signature(self, nonterminal):
+        return frozenset(
+            tuple(-1 - sym.id if isinstance(sym, Terminal) else self.nonterminal_classes[sym]
+                  for sym in rule.right)
+            for rule in self.cfg.rules.by_left(nonterminal))
+
+    def _split(self, class_num, changed):
+        members = self.classes[class_num]
+        for nonterminal in changed:
+            self.signatures[nonterminal] = self._get_signature(nonterminal)
+
+        groups = {}
+        for nonterminal in changed:
+            groups.setdefault(self.signatures[nonterminal], []).append(nonterminal)
+
+        unchanged = next((nt for nt in members if nt not in changed), None)
+        if unchanged is not None:
+            groups.pop(self.signatures[unchanged], None)
+        else:
+            groups.pop(max(groups, key=lambda signature: len(groups[signature])))
+
+        moved = []
+        for nonterminals in groups.values():
+            new_class_num = len(self.classes)
+            self.classes[new_class_num] = set(nonterminals)
             for nonterminal in nonterminals:
-                if self.nonterminal_classes[nonterminal] != class_num:
-                    updated = True
-                self.nonterminal_classes[nonterminal] = class_num
-            class_num += 1
-        
-        return updated
+                members.discard(nonterminal)
+                self.nonterminal_classes[nonterminal] = new_class_num
+            moved.extend(nonterminals)
+
+        return moved
+
+    def refine(self):
+        pending = {0: set(self.cfg.nonterminals)} if self.cfg.nonterminals else {}
+
+        while pending:
+            class_num, changed = pending.popitem()
+            for moved in self._split(class_num, changed):
+                for nonterminal in self.predecessors[moved]:
+                    pending.setdefault(self.nonterminal_classes[nonterminal], set()).add(nonterminal)
+
+        return self.nonterminal_classes
 
     def get_bisimilar_grammar(self):
-        while self._update_classes(self._get_terminal_forms()):
-            pass
-        
+        self.refine()
+
         class_reprs = {}
         for ntclass, numclass in self.nonterminal_classes.items():
             if numclass not in class_reprs or ntclass == self.cfg.start:
                 class_reprs[numclass] = ntclass
 
-        new_rules = []
+        new_rules = RuleStore()
         for rule in self.cfg.rules:
             new_left = class_reprs[self.nonterminal_classes[rule.left]]
             new_right = []
@@ -63,8 +82,6 @@ class Bisimulation:
                     new_right.append(sym)
                 else:
                     new_right.append(class_reprs[self.nonterminal_classes[sym]])
-            new_rule = Rule(new_left, new_right)
-            if new_rule not in new_rules:
-                new_rules.append(new_rule)
-        
-        return CFGrammar(self.cfg.start, list(new_rules))
+            new_rules.add(Rule(new_left, new_right))
+
+        return CFGrammar(self.cfg.start, new_rules)
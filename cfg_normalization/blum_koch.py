@@ -1,7 +1,7 @@
-from collections import defaultdict
-from copy import deepcopy
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from queue import Queue
 
 from cfg import CFGrammar, Nonterminal, Rule
 
@@ -17,37 +17,34 @@ class Transition:
     
 
 class NFA:
+    # The grammar is only used while building, so an NFA can be sent between
+    # processes without it.
     def __init__(self, cfg, nonterminal):
-        self.cfg = cfg
         self.nonterminal = nonterminal
         self.start_state = Nonterminal(nonterminal.symbol, mark=nonterminal)
-        self.final_state = self.cfg.new_nonterminal('N', set(), mark=self.nonterminal)
+        self.final_state = cfg.new_nonterminal('N', set(), mark=self.nonterminal)
         self.transitions = []
         self.reversed_transitions = []
-        self._build()
+        self._build(cfg.rules)
 
     def __str__(self):
         return (str(self.nonterminal) + '\n' +
                 '\n'.join(map(str, self.transitions)))
 
-    def _build(self):
+    def _build(self, rules):
         reachable = {self.nonterminal}
-        nonterminals_to_visit = Queue()
-        nonterminals_to_visit.put(self.nonterminal)
-
-        rules_by_nts = defaultdict(list)
-        for rule in self.cfg.rules:
-            if rule.right:
-                rules_by_nts[rule.left].append(rule)
+        nonterminals_to_visit = deque([self.nonterminal])
 
         def update(sym):
             if isinstance(sym, Nonterminal) and sym not in reachable:
-                nonterminals_to_visit.put(sym)
+                nonterminals_to_visit.append(sym)
                 reachable.add(sym)
 
-        while not nonterminals_to_visit.empty():
-            nonterminal = nonterminals_to_visit.get()
-            for rule in rules_by_nts[nonterminal]:
+        while nonterminals_to_visit:
+            nonterminal = nonterminals_to_visit.popleft()
+            for rule in rules.by_left(nonterminal):
+                if not rule.right:
+                    continue
                 if isinstance(rule.right[0], Nonterminal):
                     in_state = Nonterminal(rule.left.symbol, mark=self.nonterminal)
                     out_state = Nonterminal(rule.right[0].symbol, mark=self.nonterminal)
@@ -65,8 +62,8 @@ class NFA:
         self.start_state, self.final_state = self.final_state, self.start_state
 
     def _to_list(self, x):
-        if isinstance(x, list):
-            return x
+        if isinstance(x, (list, tuple)):
+            return list(x)
         return [x]
 
     def get_grammar(self):
@@ -84,27 +81,82 @@ class NFA:
         return CFGrammar(self.start_state, rules)
 
 
-def blum_koch_normalize(cfg):
+_worker_cfg = None
+
+
+def _init_worker(cfg):
+    global _worker_cfg
+    _worker_cfg = cfg
+
+
+def _build_reversed_nfa(cfg, nonterminal):
+    nfa = NFA(cfg, nonterminal)
+    nfa.reverse()
+    return nfa, tuple(nfa.get_grammar().rules)
+
+
+def _build_reversed_nfa_in_worker(nonterminal):
+    nfa, rules = _build_reversed_nfa(_worker_cfg, nonterminal)
+    # States go first in the order they were created while building, so that
+    # loading the result interns them as building it in place would.
+    return pickle.dumps((nfa.final_state, nfa.start_state, nfa.reversed_transitions, nfa, rules))
+
+
+def _load_reversed_nfa(data):
+    *_, nfa, rules = pickle.loads(data)
+    return nfa, rules
+
+
+def _build_in_waves(start, build_wave):
+    # Every wave holds nonterminals first met in the grammars built in
+    # the previous one, so the NFAs of a wave are independent of each other.
+    built = {}
+    wave = [start]
+    while wave:
+        next_wave = []
+        for nt, result in zip(wave, build_wave(wave)):
+            built[nt] = result
+            for rule in result[1]:
+                for sym in rule.right:
+                    if isinstance(sym, Nonterminal) and not sym.mark and sym not in built:
+                        built[sym] = None
+                        next_wave.append(sym)
+        wave = next_wave
+
+    return built
+
+
+def build_reversed_nfas(cfg, jobs=1):
+    if jobs <= 1:
+        return _build_in_waves(cfg.start, lambda wave: [_build_reversed_nfa(cfg, nt) for nt in wave])
+
+    # The grammar is sent to every worker once, and results are loaded
+    # in the order of nonterminals in a wave.
+    with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(cfg,)) as executor:
+        return _build_in_waves(cfg.start, lambda wave: map(_load_reversed_nfa, executor.map(
+            _build_reversed_nfa_in_worker, wave, chunksize=max(1, len(wave) // (4 * jobs)))))
+
+
+def blum_koch_normalize(cfg, jobs=1):
     cfg = CFGrammar.to_chomsky_normal_form(cfg)
+    built = build_reversed_nfas(cfg, jobs)
 
     nt_grammars = {}
     nfas = []
 
     def build_grammar_by_nonterminal(nt):
-        nfa = NFA(cfg, nt)
-        nfa.reverse()
+        nfa, rules = built[nt]
         nfas.append(nfa)
-        cfg_ = nfa.get_grammar()
-        nt_grammars[nt] = cfg_
+        nt_grammars[nt] = CFGrammar(nfa.start_state, rules)
 
     def get_rules_by_nonterminal(nt):
         grammar = nt_grammars[nt]
-        return list(filter(lambda rule: rule.left == grammar.start, grammar.rules))
+        return grammar.rules.by_left(grammar.start)
     
     build_grammar_by_nonterminal(cfg.start)
     new_cfg = nt_grammars[cfg.start]
-    new_rules = deepcopy(new_cfg.rules)
-    rules_to_remove_indices = []
+    new_rules = list(new_cfg.rules)
+    rules_to_remove_indices = set()
     
     for idx, rule in enumerate(new_rules):
         for sym_idx, sym in enumerate(rule.right):
@@ -112,18 +164,17 @@ def blum_koch_normalize(cfg):
                 if sym not in nt_grammars:
                     build_grammar_by_nonterminal(sym)
                     new_rules.extend(nt_grammars[sym].rules)
-                rules_to_remove_indices.append(idx)
+                rules_to_remove_indices.add(idx)
                 if sym_idx == 0:
                     new_rules.extend([Rule(rule.left, ext_rule.right + rule.right[1:])
                                         for ext_rule in get_rules_by_nonterminal(sym)])
                 else:
                     new_rules.append(
                         Rule(rule.left,
-                             rule.right[:sym_idx] + [nt_grammars[sym].start] + rule.right[sym_idx+1:]))
-                
-    for idx in rules_to_remove_indices[::-1]:
-        new_rules.pop(idx)
+                             rule.right[:sym_idx] + (nt_grammars[sym].start,) + rule.right[sym_idx+1:]))
                 
+    new_rules = [rule for idx, rule in enumerate(new_rules) if idx not in rules_to_remove_indices]
+
     if Rule(cfg.start, []) in cfg.rules:
         new_rules.append(Rule(new_cfg.start, []))
 
@@ -1,19 +1,57 @@
-from copy import deepcopy
+import heapq
+import time
 from queue import Queue
 
 
-class Nonterminal:
-    def __init__(self, symbol, mark=None):
-        self.symbol = symbol
-        self.mark = mark
+class SymbolTable:
+    def __init__(self):
+        self.symbols = []
+        self.ids = {}
+
+    def intern(self, cls, symbol, mark=None):
+        key = (cls, symbol, mark.id if mark else -1)
+        idx = self.ids.get(key)
+        if idx is None:
+            idx = self.ids[key] = len(self.symbols)
+            sym = object.__new__(cls)
+            sym.id, sym.symbol, sym.mark = idx, symbol, mark
+            self.symbols.append(sym)
+        return self.symbols[idx]
+
+    def find(self, cls, symbol, mark=None):
+        idx = self.ids.get((cls, symbol, mark.id if mark else -1))
+        return None if idx is None else self.symbols[idx]
+
+
+symbol_table = SymbolTable()
+
+
+class Symbol:
+    # Symbols are interned by the table, so equal symbols are the same object
+    # and both hashing and comparison only look at the id.
+    __slots__ = ('id', 'symbol', 'mark')
+
+    def __new__(cls, symbol, mark=None):
+        return symbol_table.intern(cls, symbol, mark)
 
     def __eq__(self, other):
-        return (isinstance(other, Nonterminal) and
-                self.symbol == other.symbol and
-                self.mark == other.mark)
+        return self is other
 
     def __hash__(self):
-        return hash(self.symbol)
+        return self.id
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return type(self), (self.symbol, self.mark)
+
+
+class Nonterminal(Symbol):
+    __slots__ = ()
 
     def __str__(self):
         if self.mark:
@@ -21,40 +59,128 @@ class Nonterminal:
         return self.symbol
 
 
-class Terminal:
-    def __init__(self, symbol):
-        self.symbol = symbol
+class Terminal(Symbol):
+    __slots__ = ()
 
-    def __eq__(self, other):
-        return (isinstance(other, Terminal) and
-                self.symbol == other.symbol)
+    def __new__(cls, symbol):
+        return symbol_table.intern(cls, symbol)
 
-    def __hash__(self):
-        return hash(self.symbol)
+    def __reduce__(self):
+        return Terminal, (self.symbol,)
 
     def __str__(self):
         return self.symbol
 
 
 class Rule:
+    __slots__ = ('left', 'right', 'hash')
+
     def __init__(self, left, right):
-        self.left = left
-        self.right = right
+        right = tuple(right)
+        object.__setattr__(self, 'left', left)
+        object.__setattr__(self, 'right', right)
+        object.__setattr__(self, 'hash', hash((left, right)))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Rules are immutable.')
 
     def __eq__(self, other):
         return (isinstance(other, Rule) and
+                self.hash == other.hash and
                 self.left == other.left and
                 self.right == other.right)
-    
+
+    def __hash__(self):
+        return self.hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return Rule, (self.left, self.right)
+
     def __str__(self):
         return f'{self.left} -> {" ".join(map(str, self.right))}'
 
 
+class RuleStore:
+    # Rules are kept in insertion order without duplicates. Dicts with no values
+    # serve as ordered sets, both for all rules and for the indexes. The index of
+    # occurrences in right sides is only built when asked for and dropped
+    # on any change, since passes that read it do not change the rules.
+    def __init__(self, rules=()):
+        self.rules = {}
+        self.rules_by_left = {}
+        self.rules_by_left_first = {}
+        self.firsts_by_left = {}
+        self.rules_by_occurrence = None
+        for rule in rules:
+            self.add(rule)
+
+    def __iter__(self):
+        return iter(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __contains__(self, rule):
+        return rule in self.rules
+
+    def add(self, rule):
+        if rule in self.rules:
+            return False
+        self.rules[rule] = None
+        self.rules_by_left.setdefault(rule.left, {})[rule] = None
+        self.rules_by_left_first.setdefault((rule.left, rule.right[:1]), {})[rule] = None
+        self.firsts_by_left.setdefault(rule.left, {})[rule.right[:1]] = None
+        self.rules_by_occurrence = None
+        return True
+
+    def discard(self, rule):
+        if rule not in self.rules:
+            return False
+        del self.rules[rule]
+        del self.rules_by_left[rule.left][rule]
+        bucket = self.rules_by_left_first[rule.left, rule.right[:1]]
+        del bucket[rule]
+        if not bucket:
+            del self.rules_by_left_first[rule.left, rule.right[:1]]
+            del self.firsts_by_left[rule.left][rule.right[:1]]
+        self.rules_by_occurrence = None
+        return True
+
+    def by_left(self, left):
+        return list(self.rules_by_left.get(left, ()))
+
+    def by_left_first(self, left, sym):
+        return list(self.rules_by_left_first.get((left, (sym,)), ()))
+
+    def has_left_first(self, left, sym):
+        return (left, (sym,)) in self.rules_by_left_first
+
+    def firsts(self, left):
+        # First symbols of the rules of the left side, without empty right sides.
+        return [first[0] for first in self.firsts_by_left.get(left, ()) if first]
+
+    def by_occurrence(self, sym):
+        # A rule is listed once for every occurrence of the symbol in its right side.
+        if self.rules_by_occurrence is None:
+            self.rules_by_occurrence = {}
+            for rule in self.rules:
+                for right_sym in rule.right:
+                    self.rules_by_occurrence.setdefault(right_sym, []).append(rule)
+        return self.rules_by_occurrence.get(sym, [])
+
+
 class CFGrammar:
     def __init__(self, start=Nonterminal('S'), rules=None):
         self.start = start
-        self.rules = rules or []
+        self.rules = rules if isinstance(rules, RuleStore) else RuleStore(rules or [])
         self.nonterminals = self._get_nonterminals()
+        self.suffixes = {}
 
     def __str__(self):
         return ('Starting: ' + str(self.start) + '\n' +
@@ -70,64 +196,50 @@ class CFGrammar:
         return nonterminals
 
     def new_nonterminal(self, sym, used_nonterminals, mark=None):
-        suffix = 0
         sym = sym.upper()
-        while Nonterminal(sym + str(suffix)) in self.nonterminals | used_nonterminals:
+        suffix = self.suffixes.get((sym, mark), 0)
+        while True:
+            candidate = symbol_table.find(Nonterminal, sym + str(suffix))
+            if candidate not in self.nonterminals and candidate not in used_nonterminals:
+                break
             suffix += 1
+        self.suffixes[sym, mark] = suffix + 1
         return Nonterminal(sym + str(suffix), mark)
 
     @staticmethod
-    def remove_long_rules(cfg):
-        used_nonterminals = set()
-        new_rules = []
-
-        def reduce_rule(left, right):
-            if len(right) > 2:
-                new_left = cfg.new_nonterminal(left.symbol, used_nonterminals)
-                used_nonterminals.add(new_left)
-                new_rules.append(Rule(left, [right[0], new_left]))
-                reduce_rule(new_left, right[1:])
-            else:
-                new_rules.append(Rule(left, right))
-
+    def _get_closed_nonterminals(cfg, counted):
+        # Collects left sides of counted rules with all nonterminals collected.
+        # Counters keep the number of occurrences of nonterminals not collected yet.
+        counter = {}
+        nonterminals_to_process = []
         for rule in cfg.rules:
-            reduce_rule(rule.left, rule.right)
-
-        return CFGrammar(cfg.start, new_rules)
+            if counted(rule):
+                counter[rule] = sum(isinstance(sym, Nonterminal) for sym in rule.right)
+                if not counter[rule]:
+                    nonterminals_to_process.append(rule.left)
+
+        closed = set()
+        while nonterminals_to_process:
+            nonterminal = nonterminals_to_process.pop()
+            if nonterminal in closed:
+                continue
+            closed.add(nonterminal)
+            for rule in cfg.rules.by_occurrence(nonterminal):
+                if rule in counter:
+                    counter[rule] -= 1
+                    if not counter[rule]:
+                        nonterminals_to_process.append(rule.left)
+
+        return closed
 
     @staticmethod
     def get_nullable_nonterminals(cfg):
-        concerned_rules = {nt: [] for nt in cfg.nonterminals}
-        counter = [0] * len(cfg.rules)
-        nullable = set()
-        nullable_to_process = Queue()
-
-        for idx, rule in enumerate(cfg.rules):
-            for sym in rule.right:
-                contains_terminal = False
-                if isinstance(sym, Nonterminal):
-                    concerned_rules[sym].append(idx)
-                    counter[idx] += 1
-                else:
-                    contains_terminal = True
-                if contains_terminal:
-                    counter[idx] = -1
-            if not rule.right:
-                nullable_to_process.put(rule.left)
-
-        while not nullable_to_process.empty():
-            left = nullable_to_process.get()
-            nullable.add(left)
-            for idx in concerned_rules[left]:
-                counter[idx] -= 1
-                if counter[idx] == 0:
-                    nullable_to_process.put(cfg.rules[idx].left)
-
-        return nullable
+        return CFGrammar._get_closed_nonterminals(
+            cfg, lambda rule: all(isinstance(sym, Nonterminal) for sym in rule.right))
 
     @staticmethod
     def remove_nullable_rules(cfg):
-        new_rules = []
+        new_rules = RuleStore()
         nullable = CFGrammar.get_nullable_nonterminals(cfg)
 
         def update_with_combinations(left, right):
@@ -135,8 +247,7 @@ class CFGrammar:
             candidates.put(right)
             while not candidates.empty():
                 rule = Rule(left, candidates.get())
-                if rule not in new_rules and rule.right:
-                    new_rules.append(rule)
+                if rule.right and new_rules.add(rule):
                     for idx, sym in enumerate(rule.right):
                         if sym in nullable:
                             candidates.put(rule.right[:idx] + rule.right[idx+1:])
@@ -146,134 +257,57 @@ class CFGrammar:
 
         if cfg.start in nullable:
             new_start = cfg.new_nonterminal(cfg.start.symbol, set())
-            new_rules.append(Rule(new_start, [cfg.start]))
-            new_rules.append(Rule(new_start, []))
+            new_rules.add(Rule(new_start, [cfg.start]))
+            new_rules.add(Rule(new_start, []))
             return CFGrammar(new_start, new_rules)
 
         return CFGrammar(cfg.start, new_rules)
 
-    @staticmethod
-    def update_start(cfg):
-        new_rules = []
-        need_new_start = False
-        for rule in cfg.rules:
-            if cfg.start in rule.right:
-                need_new_start = True
-            new_rules.append(rule)
-
-        if need_new_start:
-            start = cfg.new_nonterminal(cfg.start.symbol, set())
-            new_rules.append(Rule(start, [cfg.start]))
-            return CFGrammar(start, new_rules)
-
-        return cfg
-
     @staticmethod
     def remove_unit_rules(cfg):
-        concerned_rules = {nt: set() for nt in cfg.nonterminals}
-        new_rules = []
+        new_rules = RuleStore()
+        seen_unit_rules = set()
         unit_rules = Queue()
 
-        for idx, rule in enumerate(cfg.rules):
+        for rule in cfg.rules:
             if len(rule.right) == 1 and isinstance(rule.right[0], Nonterminal):
-                if rule.left != rule.right[0]:
+                if rule.left != rule.right[0] and rule not in seen_unit_rules:
+                    seen_unit_rules.add(rule)
                     unit_rules.put(rule)
-                    concerned_rules[rule.left].add(idx)
             else:
-                new_rules.append(Rule(rule.left, rule.right))
-                concerned_rules[rule.left].add(idx)
-            
+                new_rules.add(rule)
+
         while not unit_rules.empty():
             unit_rule = unit_rules.get()
-            for idx in concerned_rules[unit_rule.right[0]]:
-                new_rule = Rule(unit_rule.left, cfg.rules[idx].right)
+            for rule in cfg.rules.by_left(unit_rule.right[0]):
+                new_rule = Rule(unit_rule.left, rule.right)
                 if (len(new_rule.right) == 1 and isinstance(new_rule.right[0], Nonterminal)):
-                    if new_rule.left != new_rule.right[0]:
+                    if new_rule.left != new_rule.right[0] and new_rule not in seen_unit_rules:
+                        seen_unit_rules.add(new_rule)
                         unit_rules.put(new_rule)
                 else:
-                    if new_rule not in new_rules:
-                        new_rules.append(new_rule)
+                    new_rules.add(new_rule)
 
         return CFGrammar(cfg.start, new_rules)
 
     @staticmethod
     def get_generating_nonterminals(cfg):
-        concerned_rules = {nt: [] for nt in cfg.nonterminals}
-        counter = [0] * len(cfg.rules)
-        generating_to_process = Queue()
-        generating = set()
-
-        for idx, rule in enumerate(cfg.rules):
-            for sym in rule.right:
-                if isinstance(sym, Nonterminal):
-                    concerned_rules[sym].append(idx)
-                    counter[idx] += 1
-            if counter[idx] == 0:
-                generating_to_process.put(rule.left)
-
-        while not generating_to_process.empty():
-            left = generating_to_process.get()
-            generating.add(left)
-            for idx in concerned_rules[left]:
-                counter[idx] -= 1
-                if counter[idx] == 0:
-                    generating_to_process.put(cfg.rules[idx].left)
-
-        return generating
+        return CFGrammar._get_closed_nonterminals(cfg, lambda rule: True)
 
     @staticmethod
     def get_reachable_nonterminals(cfg):
         reachable = {cfg.start}
-        visited = {nt: False for nt in cfg.nonterminals}
-
-        def visit(nonterminal):
-            visited[nonterminal] = True
-            for rule in cfg.rules:
-                if rule.left == nonterminal:
-                    for sym in rule.right:
-                        if sym in cfg.nonterminals:
-                            reachable.add(sym)
-                            if not visited[sym]:
-                                visit(sym)
-        visit(cfg.start)
+        nonterminals_to_visit = [cfg.start]
 
-        return reachable
-
-    @staticmethod
-    def remove_useless_rules(cfg):
-        useful_nonterminals = (CFGrammar.get_generating_nonterminals(cfg) &
-                               CFGrammar.get_reachable_nonterminals(cfg))
-        new_rules = []
-
-        for rule in cfg.rules:
-            if rule.left in useful_nonterminals:
-                new_rules.append(Rule(rule.left, rule.right))
+        while nonterminals_to_visit:
+            nonterminal = nonterminals_to_visit.pop()
+            for rule in cfg.rules.by_left(nonterminal):
+                for sym in rule.right:
+                    if isinstance(sym, Nonterminal) and sym not in reachable:
+                        reachable.add(sym)
+                        nonterminals_to_visit.append(sym)
 
-        return CFGrammar(cfg.start, new_rules)
-
-    @staticmethod
-    def remove_terminal_rules(cfg):
-        new_rules = []
-        used_nonterminals = set()
-        
-        for rule in cfg.rules:
-            if len(rule.right) == 2:
-                right1, right2 = rule.right[0], rule.right[1]
-                if right1 not in cfg.nonterminals:
-                    new_right1 = cfg.new_nonterminal(right1.symbol, used_nonterminals)
-                    used_nonterminals.add(new_right1)
-                    new_rules.append(Rule(new_right1, [right1]))
-                    right1 = new_right1
-                if right2 not in cfg.nonterminals:
-                    new_right2 = cfg.new_nonterminal(right2.symbol, used_nonterminals)
-                    used_nonterminals.add(new_right2)
-                    new_rules.append(Rule(new_right2, [right2]))
-                    right2 = new_right2
-                new_rules.append(Rule(rule.left, [right1, right2]))
-            else:
-                new_rules.append(Rule(rule.left, rule.right))
-
-        return CFGrammar(cfg.start, new_rules)
+        return reachable
 
     @staticmethod
     def arrange_nonterminals(cfg):
@@ -285,90 +319,278 @@ class CFGrammar:
 
         return [x[0] for x in sorted(count.items(), key=lambda x: -x[1])]
 
-    @staticmethod
-    def _remove_rules(rules, indices):
-        for idx in indices:
-            rules.pop(idx)
-
     @staticmethod
     def remove_left_recursion(cfg):
-        new_rules = deepcopy(cfg.rules)
-        
-        arranged = CFGrammar.arrange_nonterminals(cfg)
-        new_nonterminals = []
-
-        def remove_direct_left_recursion(nonterminal):
-            rules_to_remove_indices = []
-            new_nonterminal = cfg.new_nonterminal(nonterminal.symbol, set())
-            new_nonterminals.append(new_nonterminal)
-
-            for idx in range(len(new_rules)):
-                rule = new_rules[idx]
-                if rule.left == nonterminal:
-                    if rule.right[0] == nonterminal:
-                        rules_to_remove_indices.append(idx)
-                        new_rules.append(Rule(new_nonterminal, rule.right[1:]))
-                        new_rules.append(Rule(new_nonterminal, rule.right[1:] + [new_nonterminal]))
-                    else:
-                        new_rules.append(Rule(nonterminal, rule.right + [new_nonterminal]))
-
-            CFGrammar._remove_rules(new_rules, rules_to_remove_indices[::-1])
-        
-        for i in range(len(arranged)):
-            for j in range(i):
-                rules_to_remove_indices = []
-                for idx in range(len(new_rules)):
-                    rule = new_rules[idx]
-                    if rule.left == arranged[i] and rule.right[0] == arranged[j]:
-                        rules_to_remove_indices.append(idx)
-                        new_rules.extend(
-                            [Rule(arranged[i], ext_rule.right + rule.right[1:])
-                            for ext_rule in new_rules if ext_rule.left == arranged[j]])
-                CFGrammar._remove_rules(new_rules, rules_to_remove_indices[::-1])
-
-            if any(arranged[i] == rule.left == rule.right[0] for rule in new_rules):
-                remove_direct_left_recursion(arranged[i])
-
-        return CFGrammar(cfg.start, new_rules), new_nonterminals[::-1] + arranged
+        new_cfg = CFGrammar(cfg.start, RuleStore(cfg.rules))
+        new_cfg.suffixes = cfg.suffixes
+        return new_cfg, GreibachNormalizer(new_cfg).remove_left_recursion()
 
     @staticmethod
-    def to_greibach_normal_form(cfg):
+    def to_greibach_normal_form(cfg, report=None):
         new_cfg = CFGrammar.remove_nullable_rules(cfg)
         new_cfg = CFGrammar.remove_unit_rules(new_cfg)
 
-        nullable_rule = None
-        for idx, rule in enumerate(new_cfg.rules):
-            if not rule.right:
-                nullable_rule = new_cfg.rules.pop(idx)
-                break
+        nullable_rule = next((rule for rule in new_cfg.rules if not rule.right), None)
+        if nullable_rule:
+            new_cfg.rules.discard(nullable_rule)
+
+        ordered_nonterminals = GreibachNormalizer(new_cfg, report).normalize()
 
-        new_cfg, ordered_nonterminals = CFGrammar.remove_left_recursion(new_cfg)
-        new_rules = deepcopy(new_cfg.rules)
-        
-        for i in range(len(ordered_nonterminals) - 1, -1, -1):
-            for j in range(i + 1, len(ordered_nonterminals)):
-                rules_to_remove_indices = []
-                for idx in range(len(new_rules)):
-                    rule = new_rules[idx]
-                    if rule.left == ordered_nonterminals[i] and rule.right[0] == ordered_nonterminals[j]:
-                        rules_to_remove_indices.append(idx)
-                        new_rules.extend(
-                            [Rule(ordered_nonterminals[i], ext_rule.right + rule.right[1:])
-                            for ext_rule in new_rules if ext_rule.left == ordered_nonterminals[j]])
-                CFGrammar._remove_rules(new_rules, rules_to_remove_indices[::-1])
-        
         if nullable_rule:
-            new_rules.append(nullable_rule)
+            new_cfg.rules.add(nullable_rule)
 
-        return CFGrammar(new_cfg.start, new_rules), ordered_nonterminals
+        return CFGrammar(new_cfg.start, new_cfg.rules), ordered_nonterminals
 
     @staticmethod
-    def to_chomsky_normal_form(cfg):
-        new_cfg = CFGrammar.remove_long_rules(cfg)
-        new_cfg = CFGrammar.remove_nullable_rules(cfg)
-        new_cfg = CFGrammar.update_start(new_cfg)
-        new_cfg = CFGrammar.remove_unit_rules(new_cfg)
-        new_cfg = CFGrammar.remove_useless_rules(new_cfg)
-        new_cfg = CFGrammar.remove_terminal_rules(new_cfg)
-
+    def to_chomsky_normal_form(cfg, report=None):
+        new_cfg = CFGrammar(cfg.start, RuleStore(cfg.rules))
+        ChomskyNormalizer(new_cfg, report).run()
         return new_cfg
+
+
+class ChomskyNormalizer:
+    # Runs passes over the rules of the grammar in place, keeping its start and
+    # nonterminals up to date, so that no pass rebuilds the grammar. Symbols that
+    # lost all their rules stay among nonterminals until useless ones are removed.
+    # Adjacent passes rewriting every rule on its own are fused into one sweep.
+    # BIN goes before DEL, so that every rule gets at most two shorter copies
+    # instead of a copy for every subset of its nullable symbols.
+    # `report` is called after each sweep with the names of its passes, the time
+    # it took and the current numbers of rules and nonterminals.
+    ORDER = ('START', 'TERM', 'BIN', 'DEL', 'UNIT', 'USELESS')
+    LOCAL = ('TERM', 'BIN')
+
+    def __init__(self, cfg, report=None):
+        self.cfg = cfg
+        self.rules = cfg.rules
+        self.report = report
+        self.terminal_nonterminals = {}
+
+    def _new_nonterminal(self, sym):
+        nonterminal = self.cfg.new_nonterminal(sym, set())
+        self.cfg.nonterminals.add(nonterminal)
+        return nonterminal
+
+    def _schedule(self, passes):
+        for name in passes:
+            if name not in self.ORDER:
+                raise ValueError(f'Unknown pass {name}.')
+        positions = [self.ORDER.index(name) for name in passes]
+        if positions != sorted(set(positions)):
+            raise ValueError('Passes must run in the order ' + ', '.join(self.ORDER) + '.')
+        if 'DEL' in passes and 'BIN' not in passes:
+            raise ValueError('DEL must run after BIN.')
+
+        sweeps = []
+        for name in passes:
+            if sweeps and name in self.LOCAL and sweeps[-1][-1] in self.LOCAL:
+                sweeps[-1].append(name)
+            else:
+                sweeps.append([name])
+        return sweeps
+
+    def _update_start(self):
+        start = self.cfg.start
+        if any(start in rule.right for rule in self.rules):
+            self.cfg.start = self._new_nonterminal(start.symbol)
+            self.rules.add(Rule(self.cfg.start, [start]))
+
+    def _replace_terminals(self, rule):
+        if len(rule.right) < 2:
+            return [rule]
+
+        new_rules = []
+        right = []
+        for sym in rule.right:
+            if isinstance(sym, Terminal):
+                nonterminal = self.terminal_nonterminals.get(sym)
+                if nonterminal is None:
+                    nonterminal = self.terminal_nonterminals[sym] = self._new_nonterminal(sym.symbol)
+                    new_rules.append(Rule(nonterminal, [sym]))
+                sym = nonterminal
+            right.append(sym)
+        new_rules.append(Rule(rule.left, right))
+        return new_rules
+
+    def _split_long_rule(self, rule):
+        new_rules = []
+        left = rule.left
+        for idx in range(len(rule.right) - 2):
+            new_left = self._new_nonterminal(left.symbol)
+            new_rules.append(Rule(left, [rule.right[idx], new_left]))
+            left = new_left
+        new_rules.append(Rule(left, rule.right[-2:]))
+        return new_rules
+
+    def _rewrite(self, passes):
+        rewrites = {'TERM': self._replace_terminals, 'BIN': self._split_long_rule}
+        for rule in list(self.rules):
+            new_rules = [rule]
+            for name in passes:
+                new_rules = [new_rule for old_rule in new_rules for new_rule in rewrites[name](old_rule)]
+            if new_rules != [rule]:
+                self.rules.discard(rule)
+                for new_rule in new_rules:
+                    self.rules.add(new_rule)
+
+    def _remove_nullable_rules(self):
+        nullable = CFGrammar.get_nullable_nonterminals(self.cfg)
+
+        for rule in list(self.rules):
+            if not rule.right:
+                self.rules.discard(rule)
+            elif len(rule.right) == 2:
+                first, second = rule.right
+                if first in nullable:
+                    self.rules.add(Rule(rule.left, [second]))
+                if second in nullable:
+                    self.rules.add(Rule(rule.left, [first]))
+
+        if self.cfg.start in nullable:
+            self.rules.add(Rule(self.cfg.start, []))
+
+    def _remove_unit_rules(self):
+        unit_targets = {}
+        for rule in list(self.rules):
+            if len(rule.right) == 1 and isinstance(rule.right[0], Nonterminal):
+                self.rules.discard(rule)
+                if rule.left != rule.right[0]:
+                    unit_targets.setdefault(rule.left, []).append(rule.right[0])
+
+        # Rules of a nonterminal may already include ones copied from its own
+        # unit targets, copying them again changes nothing.
+        for left, targets in unit_targets.items():
+            reached = {left, *targets}
+            nonterminals_to_visit = list(targets)
+            while nonterminals_to_visit:
+                nonterminal = nonterminals_to_visit.pop()
+                for rule in self.rules.by_left(nonterminal):
+                    self.rules.add(Rule(left, rule.right))
+                for target in unit_targets.get(nonterminal, ()):
+                    if target not in reached:
+                        reached.add(target)
+                        nonterminals_to_visit.append(target)
+
+    def _remove_useless_rules(self):
+        generating = CFGrammar.get_generating_nonterminals(self.cfg)
+        for rule in list(self.rules):
+            if rule.left not in generating or any(
+                    isinstance(sym, Nonterminal) and sym not in generating for sym in rule.right):
+                self.rules.discard(rule)
+
+        reachable = CFGrammar.get_reachable_nonterminals(self.cfg)
+        for rule in list(self.rules):
+            if rule.left not in reachable:
+                self.rules.discard(rule)
+
+        self.cfg.nonterminals = {nt for nt in reachable if self.rules.rules_by_left.get(nt)}
+
+    def run(self, passes=ORDER):
+        global_passes = {
+            'START': self._update_start,
+            'DEL': self._remove_nullable_rules,
+            'UNIT': self._remove_unit_rules,
+            'USELESS': self._remove_useless_rules,
+        }
+
+        for sweep in self._schedule(passes):
+            started = time.perf_counter()
+            if sweep[0] in self.LOCAL:
+                self._rewrite(sweep)
+            else:
+                global_passes[sweep[0]]()
+            if self.report:
+                self.report('+'.join(sweep), time.perf_counter() - started,
+                            len(self.rules), len(self.cfg.nonterminals))
+
+
+class GreibachNormalizer:
+    # Works on the rules of the grammar in place. Rules are immutable and shared,
+    # a substitution touches only the rules of the left side that start with
+    # the substituted nonterminal. `report` is called after each nonterminal
+    # with the stage, the progress and the current numbers of rules and symbols.
+    def __init__(self, cfg, report=None):
+        self.cfg = cfg
+        self.rules = cfg.rules
+        self.report = report
+        self.size = sum(len(rule.right) for rule in self.rules)
+
+    def _add(self, rule):
+        if self.rules.add(rule):
+            self.size += len(rule.right)
+
+    def _discard(self, rule):
+        if self.rules.discard(rule):
+            self.size -= len(rule.right)
+
+    def _report(self, stage, done, total):
+        if self.report:
+            self.report(stage, done, total, len(self.rules), self.size)
+
+    def _substitute_first(self, left, first):
+        # Returns the first symbols of the added rules.
+        new_firsts = []
+        for rule in self.rules.by_left_first(left, first):
+            self._discard(rule)
+            for ext_rule in self.rules.by_left(first):
+                right = ext_rule.right + rule.right[1:]
+                self._add(Rule(left, right))
+                new_firsts.extend(right[:1])
+        return new_firsts
+
+    def _substitute_firsts(self, left, ordered, positions, low, high):
+        # Substitutes the nonterminals at positions from low to high that the rules
+        # of the left side start with, in the order of positions. Only positions
+        # present among first symbols are visited, including ones brought by
+        # substitutions, so the work follows the substitutions actually done.
+        heap = list({positions[sym] for sym in self.rules.firsts(left)
+                     if low <= positions.get(sym, high) < high})
+        heapq.heapify(heap)
+        queued = set(heap)
+        while heap:
+            position = heapq.heappop(heap)
+            for sym in self._substitute_first(left, ordered[position]):
+                new_position = positions.get(sym, high)
+                if position < new_position < high and new_position not in queued:
+                    queued.add(new_position)
+                    heapq.heappush(heap, new_position)
+
+    def _remove_direct_left_recursion(self, nonterminal):
+        new_nonterminal = self.cfg.new_nonterminal(nonterminal.symbol, set())
+        self.cfg.nonterminals.add(new_nonterminal)
+
+        for rule in self.rules.by_left(nonterminal):
+            if rule.right[:1] == (nonterminal,):
+                self._discard(rule)
+                self._add(Rule(new_nonterminal, rule.right[1:]))
+                self._add(Rule(new_nonterminal, rule.right[1:] + (new_nonterminal,)))
+            else:
+                self._add(Rule(nonterminal, rule.right + (new_nonterminal,)))
+
+        return new_nonterminal
+
+    def remove_left_recursion(self):
+        arranged = CFGrammar.arrange_nonterminals(self.cfg)
+        positions = {nonterminal: i for i, nonterminal in enumerate(arranged)}
+        new_nonterminals = []
+
+        for i in range(len(arranged)):
+            self._substitute_firsts(arranged[i], arranged, positions, 0, i)
+
+            if self.rules.has_left_first(arranged[i], arranged[i]):
+                new_nonterminals.append(self._remove_direct_left_recursion(arranged[i]))
+            self._report('left recursion', i + 1, len(arranged))
+
+        return new_nonterminals[::-1] + arranged
+
+    def normalize(self):
+        ordered_nonterminals = self.remove_left_recursion()
+        positions = {nonterminal: i for i, nonterminal in enumerate(ordered_nonterminals)}
+
+        for i in range(len(ordered_nonterminals) - 1, -1, -1):
+            self._substitute_firsts(ordered_nonterminals[i], ordered_nonterminals, positions,
+                                    i + 1, len(ordered_nonterminals))
+            self._report('substitution', len(ordered_nonterminals) - i,
+                         len(ordered_nonterminals))
+
+        return ordered_nonterminals
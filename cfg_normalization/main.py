@@ -1,4 +1,5 @@
 import argparse
+import sys
 
 from bisimulation import Bisimulation
 from blum_koch import blum_koch_normalize
@@ -6,6 +7,16 @@ from cfg import CFGrammar
 from cfg_parser import Parser
 
 
+def print_progress(stage, done, total, rules, symbols):
+    print(f'Greibach normalization, {stage}: {done}/{total} nonterminals, '
+          f'{rules} rules, {symbols} symbols', file=sys.stderr)
+
+
+def print_pass_metrics(passes, seconds, rules, nonterminals):
+    print(f'Chomsky normalization, {passes}: {seconds:.3f} s, '
+          f'{rules} rules, {nonterminals} nonterminals', file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Normalization of a CFG.")
     parser.add_argument(
@@ -22,6 +33,10 @@ def main():
         help="Whether to use Blum-Koch algorithm for Greibach normalization. "
              "If not specified, elimination of left recursion is used.",
     )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of processes building NFAs in Blum-Koch algorithm.",
+    )
     parser.add_argument(
         "-bs", "--bisimulate", action="store_true",
         help="Whether to simplify grammar with bisimulation.",
@@ -38,18 +53,20 @@ def main():
     cfg = CFGrammar(rules=Parser().parse_grammar(lines))
 
     if args.chomsky:
-        normalized_cfg = CFGrammar.to_chomsky_normal_form(cfg)
+        normalized_cfg = CFGrammar.to_chomsky_normal_form(
+            cfg, report=print_pass_metrics if args.verbose else None)
         print(normalized_cfg)
     else:
         if args.blum_koch:
-            normalized_cfg, nfas = blum_koch_normalize(cfg)
+            normalized_cfg, nfas = blum_koch_normalize(cfg, args.jobs)
             print(normalized_cfg)
             if args.verbose:
                 print('\nNFAs for sentential forms:\n')
                 for nfa in nfas:
                     print(nfa, end='\n\n')
         else:
-            normalized_cfg, ordered_nonterminals = CFGrammar.to_greibach_normal_form(cfg)
+            normalized_cfg, ordered_nonterminals = CFGrammar.to_greibach_normal_form(
+                cfg, report=print_progress if args.verbose else None)
             print(normalized_cfg)
             if args.verbose:
                 print('\nOrder of nonterminals:',
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cfg import CFGrammar, Nonterminal
+from cfg_parser import Parser
+
+
+def parse(text):
+    return CFGrammar(rules=Parser().parse_grammar(text.splitlines(keepends=True)))
+
+
+def test_passes_run_after_left_recursion_removal():
+    cfg = parse('[S] -> [S]a\n[S] -> [T]\n[T] -> [T]b\n[T] -> c\n')
+    new_cfg, ordered_nonterminals = CFGrammar.remove_left_recursion(cfg)
+
+    assert set(ordered_nonterminals) <= new_cfg.nonterminals
+    assert new_cfg.nonterminals == CFGrammar(new_cfg.start, new_cfg.rules).nonterminals
+    assert CFGrammar.get_nullable_nonterminals(new_cfg) == set()
+    assert CFGrammar.get_generating_nonterminals(new_cfg) == new_cfg.nonterminals
+    assert Nonterminal('S') in CFGrammar.get_reachable_nonterminals(new_cfg)
+    CFGrammar.remove_unit_rules(new_cfg)
+
+
+def test_rules_with_terminals_are_not_nullable():
+    cfg = parse('[S] -> a[A][B]\n[S] -> [A]b\n[A] -> \n[B] -> \n[B] -> [A][A]\n')
+    assert CFGrammar.get_nullable_nonterminals(cfg) == {Nonterminal('A'), Nonterminal('B')}
+
+    cnf = CFGrammar.to_chomsky_normal_form(cfg)
+    assert not any(not rule.right for rule in cnf.rules)
+    gnf, _ = CFGrammar.to_greibach_normal_form(cfg)
+    assert not any(not rule.right for rule in gnf.rules)
@@ -0,0 +1,181 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+
+from dfa import DFA
+from dfa_parser import Parser
+from generators import permutation_dfa, random_dfa, synchronizing_dfa
+from monoid import EquivalenceClass, TransitionMonoid
+from utils import print_monoid_details, print_myhill_nerode_details
+
+STAGES = ("parse", "useful_states", "build", "monoid_details", "myhill_nerode")
+
+
+def generate(kind, states, letters, seed):
+    """Returns input lines of a generated DFA of the given kind."""
+    if kind == "random":
+        return random_dfa(states, letters, seed)
+    if kind == "synchronizing":
+        return synchronizing_dfa(states, seed)
+    return permutation_dfa(states, letters, seed)
+
+
+def timed(function, repeat):
+    """Returns the result of the function and the least time of its calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_case(kind, states, letters, seed, repeat):
+    """Times all stages for one generated DFA."""
+    lines = generate(kind, states, letters, seed)
+    seconds = {}
+
+    dfa, seconds["parse"] = timed(lambda: Parser().parse_dfa(lines), repeat)
+
+    def useful_table():
+        fresh = DFA(
+            dfa.states, dfa.initial_state, dfa.final_states, dfa.alphabet, dfa.table
+        )
+        return fresh.useful_table
+
+    _, seconds["useful_states"] = timed(useful_table, repeat)
+
+    def build():
+        monoid = TransitionMonoid()
+        monoid.build(dfa)
+        return monoid
+
+    monoid, seconds["build"] = timed(build, repeat)
+    classes = [EquivalenceClass.identity(dfa)] + monoid.classes
+    with contextlib.redirect_stdout(io.StringIO()):
+        _, seconds["monoid_details"] = timed(
+            lambda: print_monoid_details(monoid, dfa), repeat
+        )
+        _, seconds["myhill_nerode"] = timed(
+            lambda: print_myhill_nerode_details(classes, dfa), repeat
+        )
+
+    return {
+        "name": f"{kind}-{states}x{letters}-{seed}",
+        "kind": kind,
+        "states": states,
+        "letters": letters,
+        "seed": seed,
+        "classes": len(monoid.classes),
+        "rules": len(monoid.rewriting_rules),
+        "seconds": seconds,
+    }
+
+
+def compare(results, baseline, tolerance, min_seconds):
+    """Returns descriptions of stages that became slower than in the baseline."""
+    previous = {case["name"]: case for case in baseline["results"]}
+    regressions = []
+    for case in results:
+        old_case = previous.get(case["name"])
+        if old_case is None:
+            continue
+        for stage in STAGES:
+            old = old_case["seconds"].get(stage)
+            new = case["seconds"][stage]
+            if old is not None and new > min_seconds and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{case['name']} {stage}: {old:.4f}s -> {new:.4f}s "
+                    f"({new / max(old, 1e-9):.2f}x)"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmarking DFA and transition monoid operations."
+    )
+    parser.add_argument(
+        "-k",
+        "--kinds",
+        nargs="+",
+        choices=("random", "synchronizing", "permutation"),
+        default=["random", "synchronizing", "permutation"],
+        help="Kinds of generated DFAs.",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[3, 4],
+        help="Numbers of states of generated DFAs.",
+    )
+    parser.add_argument(
+        "--letters", type=int, default=2, help="Number of letters of generated DFAs."
+    )
+    parser.add_argument(
+        "--seeds", type=int, default=3, help="Number of DFAs of each kind and size."
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Number of runs of each stage."
+    )
+    parser.add_argument("-o", "--output", help="Path to write JSON results to.")
+    parser.add_argument(
+        "-b", "--baseline", help="Path to JSON results of a previous version."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown against the baseline reported as a regression.",
+    )
+    parser.add_argument(
+        "--min_seconds",
+        type=float,
+        default=0.001,
+        help="Stages faster than this are never reported as regressions.",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for kind in args.kinds:
+        for states in args.sizes:
+            for seed in range(args.seeds):
+                case = run_case(kind, states, args.letters, seed, args.repeat)
+                results.append(case)
+                print(
+                    f"{case['name']}: {case['classes']} classes, "
+                    + ", ".join(
+                        f"{stage} {case['seconds'][stage]:.4f}s" for stage in STAGES
+                    )
+                )
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print("\t" + regression)
+            sys.exit(1)
+        print("\nNo regressions.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import argparse
+import sys
+
+from dfa_parser import Parser
+from lazy_dfa import LazyDFA
+
+
+def load_dfa(file_path):
+    automaton = Parser().load(file_path)
+    return automaton.to_dfa() if isinstance(automaton, LazyDFA) else automaton
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comparing languages of two DFAs.")
+    parser.add_argument("first", help="Path to the file with the first DFA.")
+    parser.add_argument("second", help="Path to the file with the second DFA.")
+    parser.add_argument(
+        "-i",
+        "--inclusion",
+        action="store_true",
+        help="Whether to check that the first language is included in the second "
+        "one instead of their equality.",
+    )
+    args = parser.parse_args()
+
+    first, second = load_dfa(args.first), load_dfa(args.second)
+    if not first or not second:
+        print("Incorrect data. DFA is not DFA actually.")
+        sys.exit(2)
+
+    if args.inclusion:
+        letters = first.inclusion_counterexample(second)
+        relation = "included in"
+    else:
+        letters = first.distinguishing_word(second)
+        relation = "equivalent to"
+
+    if letters is None:
+        print(f"The first DFA is {relation} the second one.")
+        return
+    separator = first.useful_table.separator or second.useful_table.separator
+    print(
+        f"The first DFA is not {relation} the second one. "
+        f'Shortest counterexample: "{separator.join(letters)}"'
+    )
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
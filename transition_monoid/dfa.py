@@ -1,6 +1,35 @@
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from queue import Queue
-from typing import Dict, List, Optional, Set, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from prefix_cache import PrefixCache
+from transition_table import DEAD, TransitionTable
+
+_worker_automaton = None
+
+
+def _init_worker(table, initial_id, final_ids):
+    global _worker_automaton
+    _worker_automaton = (table, initial_id, final_ids)
+
+
+def _accepted(table, initial_id, final_ids, words):
+    return array(
+        "b", (state_id in final_ids for state_id in table.run_many(initial_id, words))
+    )
+
+
+def _accepts_chunk(words):
+    return _accepted(*_worker_automaton, words)
+
+
+def _chunks(words, chunk_size):
+    words = iter(words)
+    while chunk := list(islice(words, chunk_size)):
+        yield chunk
 
 
 @dataclass
@@ -11,68 +40,536 @@ class DFA:
     initial_state: str
     final_states: Set[str]
     alphabet: List[str]
-    transitions: Dict[Tuple[str, str], str]
-    reversed_transitions: Dict[Tuple[str, str], Set[str]]
+    table: TransitionTable
+    cache_capacity: int = 1 << 16
 
     def __post_init__(self):
-        self.useful_states = self._get_reachable_states() & self._get_undead_states()
-        self.memoized_accepts = {}
+        self._index_useful_states()
 
-    def _get_reachable_from(self, start_states, transitions):
-        reachable = start_states.copy()
-        states_to_visit = Queue()
+    @classmethod
+    def from_transitions(
+        cls,
+        states: Set[str],
+        initial_state: str,
+        final_states: Set[str],
+        alphabet: List[str],
+        transitions: Dict[Tuple[str, str], str],
+    ) -> "DFA":
+        """Builds the DFA with the transition table of the given transitions."""
+        table = TransitionTable(
+            states | {initial_state} | final_states, alphabet, transitions
+        )
+        return cls(states, initial_state, final_states, alphabet, table)
 
-        for state in reachable:
-            states_to_visit.put(state)
+    @property
+    def transitions(self) -> Dict[Tuple[str, str], str]:
+        """Targets of transitions by their states and letters, read from the table."""
+        table = self.table
+        states, letters, width = table.states, table.letters, table.width
+        return {
+            (states[idx // width], letters[idx % width]): states[target]
+            for idx, target in enumerate(table.targets)
+            if target != DEAD
+        }
 
-        def update(state):
-            if state not in reachable:
-                states_to_visit.put(state)
-                reachable.add(state)
+    @property
+    def reversed_transitions(self) -> Dict[Tuple[str, str], Set[str]]:
+        """Sources of transitions by their targets and letters, read from the table."""
+        reversed_transitions = {}
+        for (in_state, letter), out_state in self.transitions.items():
+            reversed_transitions.setdefault((out_state, letter), set()).add(in_state)
+        return reversed_transitions
 
-        while not states_to_visit.empty():
-            in_state = states_to_visit.get()
-            for letter in self.alphabet:
-                out_states = transitions.get((in_state, letter), None)
-                if isinstance(out_states, str):
-                    update(out_states)
-                elif isinstance(out_states, set):
-                    for out_state in out_states:
-                        update(out_state)
+    def _index_useful_states(self):
+        """Builds adjacency lists of the table and marks of useful states.
 
-        return reachable
+        `_successors[s]` and `_predecessors[s]` hold ids of the targets and
+        the sources of transitions of the state `s`, one per transition.
+        Reachable and co-reachable states are marked by two searches
+        that follow existing transitions only.
+        """
+        table = self.table
+        size, width = len(table.states), table.width
+        self._successors = [array("i") for _ in range(size)]
+        self._predecessors = [array("i") for _ in range(size)]
+        for idx, target in enumerate(table.targets):
+            if target != DEAD:
+                state_id = idx // width
+                self._successors[state_id].append(target)
+                self._predecessors[target].append(state_id)
 
-    def _get_reachable_states(self):
-        return self._get_reachable_from({self.initial_state}, self.transitions)
+        self._reachable = self._mark_from(
+            [table.state_ids[self.initial_state]], self._successors, bytearray(size)
+        )
+        self._undead = self._mark_from(
+            [table.state_ids[state] for state in self.final_states],
+            self._predecessors,
+            bytearray(size),
+        )
+        self._reset_useful_states()
 
-    def _get_undead_states(self):
-        return self._get_reachable_from(self.final_states, self.reversed_transitions)
+    @staticmethod
+    def _mark_from(start_ids, adjacency, marks) -> bytearray:
+        """Marks states reachable in the adjacency lists from the given ones."""
+        stack = [state_id for state_id in start_ids if not marks[state_id]]
+        for state_id in stack:
+            marks[state_id] = 1
+        while stack:
+            for target in adjacency[stack.pop()]:
+                if not marks[target]:
+                    marks[target] = 1
+                    stack.append(target)
+        return marks
 
-    def reach_from_state(self, state, word):
-        """Returns state that can be reached from the given state by the given word."""
-        for letter in word:
-            state = self.transitions.get((state, letter), None)
-            if not state or state not in self.useful_states:
-                return None
-        return state
-
-    def accepts(self, word: str) -> bool:
-        """Checks whether the DFA accepts given word."""
-        if word not in self.memoized_accepts:
-            self.memoized_accepts[word] = (
-                self.reach_from_state(self.initial_state, word) in self.final_states
+    def _reset_useful_states(self):
+        self._useful_states = None
+        self._useful_table = None
+        self._final_ids = None
+        self._accepts_cache = None
+
+    @property
+    def useful_states(self) -> Set[str]:
+        """States that are reachable from the initial one and reach a final one."""
+        if self._useful_states is None:
+            states = self.table.states
+            self._useful_states = {
+                states[state_id]
+                for state_id, (reachable, undead) in enumerate(
+                    zip(self._reachable, self._undead)
+                )
+                if reachable and undead
+            }
+        return self._useful_states
+
+    @property
+    def useful_table(self) -> TransitionTable:
+        if self._useful_table is None:
+            self._useful_table = self.table.restricted_to(self.useful_states)
+        return self._useful_table
+
+    @property
+    def final_ids(self) -> Set[int]:
+        if self._final_ids is None:
+            self._final_ids = {
+                self.useful_table.state_ids[state]
+                for state in self.final_states & self.useful_states
+            }
+        return self._final_ids
+
+    @property
+    def accepts_cache(self) -> PrefixCache:
+        if self._accepts_cache is None:
+            self._accepts_cache = PrefixCache(
+                self.useful_table,
+                self.useful_table.state_ids.get(self.initial_state, DEAD),
+                self.cache_capacity,
             )
+        return self._accepts_cache
+
+    def add_transition(self, in_state: str, letter: str, out_state: str) -> None:
+        """Adds the transition, replacing the one from the state by the letter.
+
+        New states are added to the DFA, letters must be in its alphabet.
+        Reachability marks are extended by searches from the new transition
+        only, derived tables are rebuilt when they are used next time.
+        """
+        if letter not in self.table.letter_ids:
+            raise ValueError(f"Letter {letter} is not in the alphabet.")
+        self.remove_transition(in_state, letter)
+        for state in (in_state, out_state):
+            if state not in self.table.state_ids:
+                self.table.add_state(state)
+                self.states.add(state)
+                self._successors.append(array("i"))
+                self._predecessors.append(array("i"))
+                self._reachable.append(0)
+                self._undead.append(state in self.final_states)
+
+        in_id, out_id = self.table.state_ids[in_state], self.table.state_ids[out_state]
+        self.table.set_target(in_id, self.table.letter_ids[letter], out_id)
+        self._successors[in_id].append(out_id)
+        self._predecessors[out_id].append(in_id)
+
+        if self._reachable[in_id]:
+            self._mark_from([out_id], self._successors, self._reachable)
+        if self._undead[out_id]:
+            self._mark_from([in_id], self._predecessors, self._undead)
+        self._reset_useful_states()
+
+    def remove_transition(self, in_state: str, letter: str) -> None:
+        """Removes the transition from the state by the letter if there is one.
+
+        Reachability marks are recomputed only if the transition connected
+        two marked states, otherwise they cannot change.
+        """
+        in_id = self.table.state_ids.get(in_state, DEAD)
+        letter_id = self.table.letter_ids.get(letter)
+        if in_id == DEAD or letter_id is None:
+            return
+        out_id = self.table.step(in_id, letter_id)
+        if out_id == DEAD:
+            return
+
+        self.table.set_target(in_id, letter_id, DEAD)
+        self._successors[in_id].remove(out_id)
+        self._predecessors[out_id].remove(in_id)
+
+        size = len(self.table.states)
+        if self._reachable[in_id] and self._reachable[out_id]:
+            self._reachable = self._mark_from(
+                [self.table.state_ids[self.initial_state]],
+                self._successors,
+                bytearray(size),
+            )
+        if self._undead[in_id] and self._undead[out_id]:
+            self._undead = self._mark_from(
+                [self.table.state_ids[state] for state in self.final_states],
+                self._predecessors,
+                bytearray(size),
+            )
+        self._reset_useful_states()
+
+    def reach_from_state(self, state, word):
+        """Returns state that can be reached from the given state by the given word.
+
+        Words are given as strings, with the table separator between letters,
+        or as sequences of letters, as in all methods reading words.
+        """
+        if not word:
+            return state
+        state_id = self.useful_table.run(
+            self.useful_table.state_ids.get(state, DEAD),
+            self.useful_table.split_word(word),
+        )
+        return None if state_id == DEAD else self.useful_table.states[state_id]
+
+    def accepts(self, word: Sequence[str]) -> bool:
+        """Checks whether the DFA accepts given word.
+
+        Words are read through a bounded cache, so a repeated query takes
+        one lookup and a query extending a recent one by a letter takes one step.
+        """
+        return self.accepts_cache.reach(word) in self.final_ids
+
+    def accepts_many(
+        self,
+        words: Iterable[Sequence[str]],
+        processes: Optional[int] = None,
+        chunk_size: int = 1 << 16,
+    ) -> array:
+        """Checks whether the DFA accepts each of the given words.
+
+        Returns an array with 1 for accepted words and 0 for the others.
+        If the number of processes is given, chunks of words are checked
+        in a process pool that receives the transition table once.
+        """
+        result = array("b")
+        for accepted in self.iter_accepts(words, processes, chunk_size):
+            result.extend(accepted)
+        return result
+
+    def iter_accepts(
+        self,
+        words: Iterable[Sequence[str]],
+        processes: Optional[int] = None,
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[array]:
+        """Reads the words by chunks and yields acceptance arrays for each chunk.
+
+        A process pool gets at most two chunks per process ahead of the
+        yielded ones, so the words are read lazily in both modes.
+        """
+        initial_id = self.useful_table.state_ids.get(self.initial_state, DEAD)
+        initargs = (self.useful_table, initial_id, self.final_ids)
+
+        if not processes:
+            for chunk in _chunks(words, chunk_size):
+                yield _accepted(*initargs, chunk)
+            return
 
-        return self.memoized_accepts[word]
+        with ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            pending = deque()
+            for chunk in _chunks(words, chunk_size):
+                pending.append(executor.submit(_accepts_chunk, chunk))
+                if len(pending) >= 2 * processes:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
 
-    def sync_from_word(self, word: str) -> Optional[str]:
+    def accepts_file(
+        self,
+        file_path: str,
+        processes: Optional[int] = None,
+        chunk_size: int = 1 << 16,
+    ) -> array:
+        """Checks whether the DFA accepts each word of the file, one word per line."""
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            return self.accepts_many(
+                (line.rstrip("\n") for line in file), processes, chunk_size
+            )
+
+    def sync_from_word(self, word: Sequence[str]) -> Optional[str]:
         """Returns the state to which the word synchronizes the DFA."""
-        sync_state = self.reach_from_state(self.initial_state, word)
-        return (
-            sync_state
-            if all(
-                sync_state == self.reach_from_state(state, word)
-                for state in self.useful_states
+        table = self.useful_table
+        reached = table.simulate(range(len(table.states)), table.split_word(word))
+        if not reached:
+            return self.reach_from_state(self.initial_state, word)
+        if len(reached) == 1 and DEAD not in reached:
+            return table.states[reached.pop()]
+        return None
+
+    def shortest_synchronizing_word(self) -> Optional[List[str]]:
+        """Returns letters of the shortest word that synchronizes the DFA if any.
+
+        Performs a breadth-first search over sets of useful states
+        starting from the set of all of them. Each reached set keeps only
+        the set and the letter it was reached by, the word is rebuilt once
+        a singleton is found.
+        """
+        table = self.useful_table
+        start = frozenset(range(len(table.states)))
+        if len(start) <= 1:
+            return [] if start else None
+
+        parents = {start: None}
+        subsets_to_visit = deque([start])
+
+        while subsets_to_visit:
+            subset = subsets_to_visit.popleft()
+            for letter_id, letter in enumerate(table.letters):
+                image = frozenset(
+                    table.targets[state_id * table.width + letter_id]
+                    for state_id in subset
+                )
+                if DEAD in image or image in parents:
+                    continue
+                parents[image] = subset, letter
+                if len(image) == 1:
+                    return self._word_to(image, parents)
+                subsets_to_visit.append(image)
+
+        return None
+
+    def _product_steps(self, other: "DFA"):
+        """Returns letters of both DFAs and the step function of their pairs.
+
+        States of each DFA are its useful state ids and the id after them
+        for a sink, which stands for useless states and missing transitions.
+        """
+        letters = sorted(set(self.alphabet) | set(other.alphabet))
+        columns = []
+        for table in (self.useful_table, other.useful_table):
+            sink = len(table.states)
+            column = [
+                array("i", [sink]) * (sink + 1) for _ in range(len(letters))
+            ]
+            for letter_idx, letter in enumerate(letters):
+                letter_id = table.letter_ids.get(letter)
+                if letter_id is None:
+                    continue
+                for state_id in range(sink):
+                    target = table.step(state_id, letter_id)
+                    if target != DEAD:
+                        column[letter_idx][state_id] = target
+            columns.append(column)
+
+        def step(pair, letter_idx):
+            return (
+                columns[0][letter_idx][pair[0]],
+                columns[1][letter_idx][pair[1]],
             )
-            else None
+
+        return letters, step
+
+    @staticmethod
+    def _start_and_finals(dfa: "DFA"):
+        table = dfa.useful_table
+        return table.state_ids.get(dfa.initial_state, len(table.states)), dfa.final_ids
+
+    @staticmethod
+    def _word_to(node, parents) -> List[str]:
+        word = []
+        while parents[node] is not None:
+            node, letter = parents[node]
+            word.append(letter)
+        return word[::-1]
+
+    def distinguishing_word(self, other: "DFA") -> Optional[List[str]]:
+        """Returns letters of the shortest word accepted by only one of the DFAs.
+
+        Uses the Hopcroft-Karp algorithm: pairs of states that must be
+        equivalent are merged in a union-find structure, and a pair is explored
+        in breadth-first order only if it merges two different sets. None
+        means that the DFAs accept the same language.
+        """
+        letters, step = self._product_steps(other)
+        first_start, first_finals = self._start_and_finals(self)
+        second_start, second_finals = self._start_and_finals(other)
+        offset = len(self.useful_table.states) + 1
+        parent = list(range(offset + len(other.useful_table.states) + 1))
+
+        def find(vertex):
+            while parent[vertex] != vertex:
+                parent[vertex] = parent[parent[vertex]]
+                vertex = parent[vertex]
+            return vertex
+
+        def differ(pair):
+            return (pair[0] in first_finals) != (pair[1] in second_finals)
+
+        pairs = [(first_start, second_start)]
+        parents = [None]
+        if differ(pairs[0]):
+            return []
+        parent[first_start] = find(offset + second_start)
+
+        for pair_idx, pair in enumerate(pairs):
+            for letter_idx, letter in enumerate(letters):
+                target = step(pair, letter_idx)
+                first_root = find(target[0])
+                second_root = find(offset + target[1])
+                if first_root == second_root:
+                    continue
+                pairs.append(target)
+                parents.append((pair_idx, letter))
+                if differ(target):
+                    return self._word_to(len(pairs) - 1, parents)
+                parent[first_root] = second_root
+
+        return None
+
+    def equivalent(self, other: "DFA") -> bool:
+        """Returns whether the DFAs accept the same language."""
+        return self.distinguishing_word(other) is None
+
+    def inclusion_counterexample(self, other: "DFA") -> Optional[List[str]]:
+        """Returns letters of the shortest word accepted by this DFA only.
+
+        Performs a breadth-first search over pairs of states reachable in
+        the product of the DFAs without building it. Pairs whose first state
+        is the sink are skipped since this DFA accepts nothing from them.
+        None means that the language of this DFA is included in the other one.
+        """
+        letters, step = self._product_steps(other)
+        first_start, first_finals = self._start_and_finals(self)
+        second_start, second_finals = self._start_and_finals(other)
+        sink = len(self.useful_table.states)
+
+        def differ(pair):
+            return pair[0] in first_finals and pair[1] not in second_finals
+
+        pairs = [(first_start, second_start)]
+        parents = [None]
+        if differ(pairs[0]):
+            return []
+        visited = set(pairs)
+
+        for pair_idx, pair in enumerate(pairs):
+            for letter_idx, letter in enumerate(letters):
+                target = step(pair, letter_idx)
+                if target[0] == sink or target in visited:
+                    continue
+                visited.add(target)
+                pairs.append(target)
+                parents.append((pair_idx, letter))
+                if differ(target):
+                    return self._word_to(len(pairs) - 1, parents)
+
+        return None
+
+    def included_in(self, other: "DFA") -> bool:
+        """Returns whether every word accepted by this DFA is accepted by the other."""
+        return self.inclusion_counterexample(other) is None
+
+    def minimize(self) -> Tuple["DFA", List[Set[str]]]:
+        """Returns the minimal DFA and the partition of useful states into its states.
+
+        Uses Hopcroft's algorithm on the useful part of the DFA, completed
+        with a sink state that stands for all missing transitions.
+        """
+        table = self.useful_table
+        size, width = len(table.states), table.width
+        sink = size
+        predecessors = [[[] for _ in range(size + 1)] for _ in range(width)]
+        for state_id in range(size):
+            for letter_id in range(width):
+                target = table.step(state_id, letter_id)
+                predecessors[letter_id][sink if target == DEAD else target].append(
+                    state_id
+                )
+        for letter_id in range(width):
+            predecessors[letter_id][sink].append(sink)
+
+        final_ids = {
+            table.state_ids[state]
+            for state in self.final_states
+            if state in table.state_ids
+        }
+        blocks = [
+            block
+            for block in (set(final_ids), set(range(size + 1)) - final_ids)
+            if block
+        ]
+        block_of = [0] * (size + 1)
+        for block_id, block in enumerate(blocks):
+            for state_id in block:
+                block_of[state_id] = block_id
+
+        smallest = min(range(len(blocks)), key=lambda block_id: len(blocks[block_id]))
+        worklist = [(smallest, letter_id) for letter_id in range(width)]
+        pending = set(worklist)
+
+        while worklist:
+            splitter = worklist.pop()
+            pending.discard(splitter)
+            splitter_id, letter_id = splitter
+
+            touched = {}
+            for target in blocks[splitter_id]:
+                for state_id in predecessors[letter_id][target]:
+                    touched.setdefault(block_of[state_id], set()).add(state_id)
+
+            for block_id, inside in touched.items():
+                block = blocks[block_id]
+                if len(inside) == len(block):
+                    continue
+                block.difference_update(inside)
+                new_id = len(blocks)
+                blocks.append(inside)
+                for state_id in inside:
+                    block_of[state_id] = new_id
+                for other_letter_id in range(width):
+                    if (block_id, other_letter_id) in pending:
+                        chosen = new_id
+                    else:
+                        chosen = new_id if len(inside) <= len(block) else block_id
+                    if (chosen, other_letter_id) not in pending:
+                        pending.add((chosen, other_letter_id))
+                        worklist.append((chosen, other_letter_id))
+
+        blocks = sorted((block for block in blocks if sink not in block), key=min)
+        names = {}
+        for block in blocks:
+            for state_id in block:
+                names[state_id] = table.states[min(block)]
+
+        transitions = {}
+        for block in blocks:
+            state_id = min(block)
+            for letter_id, letter in enumerate(table.letters):
+                target = table.step(state_id, letter_id)
+                if target != DEAD:
+                    transitions[names[state_id], letter] = names[target]
+
+        initial_id = table.state_ids.get(self.initial_state, DEAD)
+        minimal = DFA.from_transitions(
+            set(names.values()) or {self.initial_state},
+            names.get(initial_id, self.initial_state),
+            {names[state_id] for state_id in final_ids},
+            list(self.alphabet),
+            transitions,
         )
+        partition = [{table.states[state_id] for state_id in block} for block in blocks]
+        return minimal, partition
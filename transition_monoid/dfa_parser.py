@@ -1,52 +1,134 @@
-import re
-from typing import List, Optional
+import mmap
+from array import array
+from typing import Iterable, List, Optional, Union
 
 from dfa import DFA
+from lazy_dfa import LazyDFA
+from transition_table import DEAD, TransitionTable
 
 
 class Parser:
-    """Represents a class that performs parsing of the DFA input."""
-    
-    state_pattern = re.compile(r'[A-Z][0-9]?')
-    letter_pattern = re.compile(r'[a-z]')
+    """Represents a class that performs parsing of the DFA input.
+
+    States and letters may be any identifiers without whitespace
+    and the characters `<`, `>`, `{`, `}` and `,`.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.state_ids = {}
+        self.states = []
+        self.letter_ids = {}
+        self.letters = []
+        self.columns = []
+        self.nondeterministic = {}
+
+    def _intern_state(self, name):
+        state_id = self.state_ids.get(name)
+        if state_id is None:
+            state_id = self.state_ids[name] = len(self.states)
+            self.states.append(name.decode())
+        return state_id
+
+    def _intern_letter(self, name):
+        letter_id = self.letter_ids.get(name)
+        if letter_id is None:
+            letter_id = self.letter_ids[name] = len(self.letters)
+            self.letters.append(name.decode())
+            self.columns.append(array("i"))
+        return letter_id
 
     def _parse_states(self, line):
-        line_splitted = re.split(r'{', line)
-        initial_state = self.state_pattern.search(line_splitted[0]).group() # type: ignore
-        final_states = self.state_pattern.findall(line_splitted[1])
+        initial_state, _, final_states = line.strip()[1:-1].partition(b",")
+        final_states = final_states.strip()[1:-1].split(b",")
+        return (
+            self._intern_state(initial_state.strip()),
+            {
+                self._intern_state(state.strip())
+                for state in final_states
+                if state.strip()
+            },
+        )
 
-        return initial_state, set(final_states)
+    def _parse_transition(self, line):
+        left, arrow, out_state = line.partition(b"->")
+        if not arrow:
+            return
+        in_state, _, letter = left.strip()[1:-1].partition(b",")
+        in_id = self._intern_state(in_state.strip())
+        letter_id = self._intern_letter(letter.strip())
+        out_id = self._intern_state(out_state.strip())
 
-    def _parse_transitions(self, lines):
-        states = set()
-        alphabet = set()
-        transitions = {}
-        reversed_transitions = {}
+        column = self.columns[letter_id]
+        if len(column) <= in_id:
+            column.extend([DEAD] * (in_id + 1 - len(column)))
+        if column[in_id] == DEAD:
+            column[in_id] = out_id
+        elif column[in_id] != out_id:
+            self.nondeterministic.setdefault((in_id, letter_id), {column[in_id]}).add(
+                out_id
+            )
 
+    def _parse_lines(self, lines: Iterable[bytes]) -> Union[DFA, LazyDFA, None]:
+        self._reset()
+        lines = iter(lines)
+        first_line = next(lines, None)
+        if first_line is None:
+            return None
+        initial_id, final_ids = self._parse_states(first_line)
         for line in lines:
-            if not line.isspace():
-                line_splitted = re.split(r'->', line)
-                in_state = self.state_pattern.search(line_splitted[0]).group() # type: ignore
-                letter = self.letter_pattern.search(line_splitted[0]).group() # type: ignore
-                out_state = self.state_pattern.search(line_splitted[1]).group() # type: ignore
-                
-                if (in_state, letter) in transitions:
-                    return set(), set(), {}, {}, False
-                
-                states.update({in_state, out_state})
-                alphabet.add(letter)
-                transitions[in_state, letter] = out_state
-                r_out_states = reversed_transitions.get((out_state, letter), set())
-                r_out_states.add(in_state)
-                reversed_transitions[out_state, letter] = r_out_states
-
-        return states, alphabet, transitions, reversed_transitions, True
+            self._parse_transition(line)
+
+        for column in self.columns:
+            column.extend([DEAD] * (len(self.states) - len(column)))
+
+        states = set(self.states)
+        initial_state = self.states[initial_id]
+        final_states = {self.states[state_id] for state_id in final_ids}
+        alphabet = sorted(self.letters)
+
+        if self.nondeterministic:
+            transitions = {}
+            for letter_id, letter in enumerate(self.letters):
+                column = self.columns[letter_id]
+                for in_id, out_id in enumerate(column):
+                    if out_id != DEAD:
+                        transitions[self.states[in_id], letter] = {
+                            self.states[state_id]
+                            for state_id in self.nondeterministic.get(
+                                (in_id, letter_id), {out_id}
+                            )
+                        }
+            return LazyDFA(states, initial_state, final_states, alphabet, transitions)
+
+        table = TransitionTable.from_columns(self.states, self.letters, self.columns)
+        return DFA(states, initial_state, final_states, alphabet, table)
+
+    def load(self, file_path: str) -> Union[DFA, LazyDFA, None]:
+        """Reads the file in one pass and returns DFA or lazily determinized NFA.
+
+        The file is memory-mapped, states and letters get integer ids
+        in order of their first occurrence.
+        """
+        with open(file_path, mode="rb") as file:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                return None
+            with data:
+                return self._parse_lines(iter(data.readline, b""))
+
+    def parse_automaton(self, lines: List[str]) -> Union[DFA, LazyDFA, None]:
+        """Parses input lines and returns DFA or lazily determinized NFA."""
+        return self._parse_lines(line.encode() for line in lines)
 
     def parse_dfa(self, lines: List[str]) -> Optional[DFA]:
-        """Parses input lines and returns DFA if the data is correct."""
-        initial_state, final_states = self._parse_states(lines[0])
-        (states, alphabet, transitions,
-         reversed_transitions, deterministic)  = self._parse_transitions(lines[1:])
-        alphabet = sorted(list(alphabet))
-        return DFA(states, initial_state, final_states,
-                   alphabet, transitions, reversed_transitions) if deterministic else None
+        """Parses input lines and returns DFA if the data is correct.
+
+        Nondeterministic input is determinized: the subsets reachable
+        from the initial state become states of the DFA.
+        """
+        automaton = self.parse_automaton(lines)
+        return automaton.to_dfa() if isinstance(automaton, LazyDFA) else automaton
@@ -0,0 +1,233 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from transition_table import TransitionTable
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+EMPTY = -1
+# State images computed between two checks of time and memory limits.
+CHECK_WORK = 1 << 16
+
+
+@dataclass
+class EnumerationLimits:
+    """Represents limits on the number of elements, peak memory (bytes) and time."""
+
+    max_elements: Optional[int] = None
+    max_memory: Optional[int] = None
+    max_seconds: Optional[float] = None
+
+    def exceeded(self, elements: int, started: float) -> Optional[str]:
+        """Returns the limit exceeded by an enumeration started at `started`."""
+        if self.max_elements is not None and elements > self.max_elements:
+            return "size"
+        if self.max_seconds is not None:
+            if time.monotonic() - started >= self.max_seconds:
+                return "time"
+        if self.max_memory is not None and _peak_memory() >= self.max_memory:
+            return "memory"
+        return None
+
+
+@dataclass
+class EnumerationStatistics:
+    """Represents statistics of a finished or stopped enumeration."""
+
+    elements: int = 0
+    rules: int = 0
+    word_length: int = 0
+    seconds: float = 0.0
+    stopped_by: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.stopped_by is None
+
+
+def _peak_memory():
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class FroidurePin:
+    """Enumerates the transition semigroup of a DFA with the Froidure-Pin algorithm.
+
+    Elements are the transformations of useful states induced by non-empty words.
+    They are numbered in the shortlex order of their reduced words. A product
+    u·a is composed explicitly only when the suffix of u·a is reduced, otherwise
+    it is read from the already built parts of the Cayley graphs.
+    """
+
+    def __init__(self, table: TransitionTable):
+        self.table = table
+        self.transformations: List[Tuple[int, ...]] = []
+        self.indices: Dict[Tuple[int, ...], int] = {}
+        self.words: List[str] = []
+        self.first: List[int] = []
+        self.last: List[int] = []
+        self.prefix: List[int] = []
+        self.suffix: List[int] = []
+        self.right: List[List[int]] = []
+        self.left: List[List[int]] = []
+        self.reduced: List[List[bool]] = []
+        self.generators: List[int] = []
+        self.new_generators: List[bool] = []
+        self.rules: List[Tuple[int, int, int]] = []
+        self.statistics = EnumerationStatistics()
+        self._yielded_elements = 0
+        self._yielded_rules = 0
+        self._work = 0
+        self._next_check = 0
+
+    def _add_element(self, transformation, word, first, last, prefix, suffix):
+        idx = len(self.words)
+        self.transformations.append(transformation)
+        self.indices[transformation] = idx
+        self.words.append(word)
+        self.first.append(first)
+        self.last.append(last)
+        self.prefix.append(prefix)
+        self.suffix.append(suffix)
+        self.right.append([EMPTY] * self.table.width)
+        self.left.append([EMPTY] * self.table.width)
+        self.reduced.append([False] * self.table.width)
+        return idx
+
+    def _add_generator(self, letter_id):
+        identity = range(len(self.table.states))
+        transformation = self.table.apply(identity, letter_id)
+        self._work += len(transformation)
+        idx = self.indices.get(transformation)
+        if idx is None:
+            letter = self.table.letters[letter_id]
+            idx = self._add_element(
+                transformation, letter, letter_id, letter_id, EMPTY, EMPTY
+            )
+            self.new_generators.append(True)
+        else:
+            self.rules.append((EMPTY, letter_id, idx))
+            self.new_generators.append(False)
+        self.generators.append(idx)
+
+    def _product_with_letter_on_left(self, letter_id, idx):
+        """Returns the product of the letter and the element, both known."""
+        prefix = self.prefix[idx]
+        left = (
+            self.generators[letter_id]
+            if prefix == EMPTY
+            else self.left[prefix][letter_id]
+        )
+        return self.right[left][self.last[idx]]
+
+    def _multiply_right(self, idx):
+        first, suffix = self.first[idx], self.suffix[idx]
+        self._work += self.table.width
+        for letter_id, letter in enumerate(self.table.letters):
+            if suffix == EMPTY:
+                suffix_reduced = self.new_generators[letter_id]
+                suffix_product = self.generators[letter_id]
+            else:
+                suffix_reduced = self.reduced[suffix][letter_id]
+                suffix_product = self.right[suffix][letter_id]
+
+            if not suffix_reduced:
+                product = self._product_with_letter_on_left(first, suffix_product)
+            else:
+                transformation = self.table.apply(self.transformations[idx], letter_id)
+                self._work += len(transformation)
+                product = self.indices.get(transformation)
+                if product is None:
+                    product = self._add_element(
+                        transformation,
+                        self.table.append_letter(self.words[idx], letter),
+                        first,
+                        letter_id,
+                        idx,
+                        suffix_product,
+                    )
+                    self.reduced[idx][letter_id] = True
+                else:
+                    self.rules.append((idx, letter_id, product))
+            self.right[idx][letter_id] = product
+
+    def _multiply_left(self, idx):
+        for letter_id in range(self.table.width):
+            self.left[idx][letter_id] = self._product_with_letter_on_left(
+                letter_id, idx
+            )
+
+    def run(self) -> None:
+        """Enumerates all elements and builds both Cayley graphs."""
+        for _ in self.enumerate():
+            pass
+
+    def _discoveries(self):
+        for idx in range(self._yielded_elements, len(self.words)):
+            yield "element", idx
+        for idx in range(self._yielded_rules, len(self.rules)):
+            yield "rule", idx
+        self._yielded_elements, self._yielded_rules = len(self.words), len(self.rules)
+
+    def _exceeded_limit(self, limits, started):
+        if limits.max_elements is not None and len(self.words) > limits.max_elements:
+            return "size"
+        if self._work < self._next_check:
+            return None
+        self._next_check = self._work + CHECK_WORK
+        return limits.exceeded(len(self.words), started)
+
+    def enumerate(
+        self, limits: Optional[EnumerationLimits] = None
+    ) -> Iterator[Tuple[str, int]]:
+        """Enumerates elements and yields them and rewriting rules once found.
+
+        Yields pairs `("element", idx)` and `("rule", idx)` with indices in
+        `words` and `rules`. The enumeration stops after the generator or
+        the element whose products exceed some of the limits, and `statistics`
+        tell what was done. Time and memory are checked whenever `CHECK_WORK`
+        more state images are computed, so rarely on small DFAs and often on
+        large ones. The left Cayley graph is complete only if nothing stopped it.
+        """
+        limits = limits or EnumerationLimits()
+        started = time.monotonic()
+
+        stopped_by = None
+        for letter_id in range(self.table.width):
+            self._add_generator(letter_id)
+            stopped_by = self._exceeded_limit(limits, started)
+            if stopped_by:
+                break
+        yield from self._discoveries()
+        level_start = 0
+        while level_start < len(self.words) and not stopped_by:
+            level_end = len(self.words)
+            for idx in range(level_start, level_end):
+                self._multiply_right(idx)
+                yield from self._discoveries()
+                stopped_by = self._exceeded_limit(limits, started)
+                if stopped_by:
+                    break
+            else:
+                for idx in range(level_start, level_end):
+                    self._multiply_left(idx)
+            level_start = level_end
+
+        self.statistics = EnumerationStatistics(
+            elements=len(self.words),
+            rules=len(self.rules),
+            word_length=len(self.table.split_word(self.words[-1])) if self.words else 0,
+            seconds=time.monotonic() - started,
+            stopped_by=stopped_by,
+        )
+
+    def rule_word(self, idx: int, letter_id: int) -> str:
+        """Returns the word of the element followed by the letter."""
+        word = "" if idx == EMPTY else self.words[idx]
+        return self.table.append_letter(word, self.table.letters[letter_id])
@@ -0,0 +1,65 @@
+import random
+from typing import List
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def _lines(initial_state, final_states, transitions) -> List[str]:
+    lines = [f"<{initial_state}, {{{', '.join(final_states)}}}>\n"]
+    for (state, letter), target in transitions.items():
+        lines.append(f"<{state}, {letter}> -> {target}\n")
+    return lines
+
+
+def random_dfa(
+    states: int, letters: int, seed: int, density: float = 1.0
+) -> List[str]:
+    """Returns input lines of a DFA with uniformly random transitions.
+
+    Each transition is present with the given probability, and each state
+    is final with probability one half, at least one state being final.
+    """
+    rng = random.Random(seed)
+    names = [f"Q{idx}" for idx in range(states)]
+    transitions = {
+        (state, letter): rng.choice(names)
+        for state in names
+        for letter in LETTERS[:letters]
+        if rng.random() < density
+    }
+    final_states = [state for state in names if rng.random() < 0.5] or [names[-1]]
+    return _lines(names[0], final_states, transitions)
+
+
+def synchronizing_dfa(states: int, seed: int) -> List[str]:
+    """Returns input lines of the Černý automaton with shuffled state names.
+
+    Letter `a` rotates the states and letter `b` merges one state into
+    the next, so the shortest synchronizing word has length (states - 1)^2.
+    """
+    rng = random.Random(seed)
+    names = [f"Q{idx}" for idx in range(states)]
+    rng.shuffle(names)
+    transitions = {}
+    for idx, state in enumerate(names):
+        transitions[state, "a"] = names[(idx + 1) % states]
+        transitions[state, "b"] = names[1 % states] if idx == 0 else state
+    final_states = rng.sample(names, rng.randint(1, states))
+    return _lines(names[0], final_states, transitions)
+
+
+def permutation_dfa(states: int, letters: int, seed: int) -> List[str]:
+    """Returns input lines of a DFA whose letters act as random permutations.
+
+    The transition monoid of such a DFA is a permutation group.
+    """
+    rng = random.Random(seed)
+    names = [f"Q{idx}" for idx in range(states)]
+    transitions = {}
+    for letter in LETTERS[:letters]:
+        targets = names[:]
+        rng.shuffle(targets)
+        for state, target in zip(names, targets):
+            transitions[state, letter] = target
+    final_states = rng.sample(names, rng.randint(1, states))
+    return _lines(names[0], final_states, transitions)
@@ -0,0 +1,149 @@
+from dataclasses import dataclass
+from typing import List
+
+from dfa import DFA
+from monoid import EquivalenceClass, TransitionMonoid
+from transition_table import DEAD
+
+
+@dataclass
+class GreenStructure:
+    """Represents Green's relations of a transition monoid.
+
+    Elements are given by their words, the identity by the empty word.
+    Classes of each relation are ordered by their shortest words.
+    """
+
+    r_classes: List[List[str]]
+    l_classes: List[List[str]]
+    j_classes: List[List[str]]
+    idempotents: List[str]
+    aperiodic: bool
+
+
+def _strongly_connected_components(graph):
+    """Returns components of the graph with Tarjan's algorithm without recursion."""
+    size = len(graph)
+    index = [-1] * size
+    low = [0] * size
+    on_stack = [False] * size
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(size):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+
+        while work:
+            vertex, edge_idx = work[-1]
+            if edge_idx < len(graph[vertex]):
+                work[-1] = (vertex, edge_idx + 1)
+                target = graph[vertex][edge_idx]
+                if index[target] == -1:
+                    index[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    work.append((target, 0))
+                elif on_stack[target]:
+                    low[vertex] = min(low[vertex], index[target])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[vertex])
+            if low[vertex] == index[vertex]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == vertex:
+                        break
+                components.append(sorted(component))
+
+    return sorted(components)
+
+
+def analyze_green_relations(monoid: TransitionMonoid, dfa: DFA) -> GreenStructure:
+    """Computes Green's relations, idempotents and aperiodicity of the monoid.
+
+    R-, L- and J-classes are strongly connected components of the right,
+    the left and the union of both Cayley graphs of the monoid with identity.
+    The monoid is aperiodic iff all its H-classes (R ∩ L) are trivial.
+    The left Cayley graph is derived from transformations if it is not filled.
+    """
+    table = dfa.useful_table
+    identity = EquivalenceClass.identity(dfa)
+    indices = {cls.transformation: idx for idx, cls in enumerate(monoid.classes)}
+    elements = list(monoid.classes)
+    right = [list(products) for products in monoid.right_cayley_graph]
+    left = [list(products) for products in monoid.left_cayley_graph]
+    if not left:
+        letters = [
+            table.apply(identity.transformation, letter_id)
+            for letter_id in range(table.width)
+        ]
+        left = [
+            [
+                indices[
+                    tuple(
+                        DEAD if image == DEAD else cls.transformation[image]
+                        for image in letter
+                    )
+                ]
+                for letter in letters
+            ]
+            for cls in monoid.classes
+        ]
+
+    if identity.transformation not in indices:
+        generators = [
+            indices[table.apply(identity.transformation, letter_id)] + 1
+            for letter_id in range(table.width)
+        ]
+        elements = [identity] + elements
+        right = [generators] + [[idx + 1 for idx in products] for products in right]
+        left = [generators] + [[idx + 1 for idx in products] for products in left]
+
+    def words(components):
+        return [[elements[idx].word for idx in component] for component in components]
+
+    r_components = _strongly_connected_components(right)
+    l_components = _strongly_connected_components(left)
+    j_components = _strongly_connected_components(
+        [products + left[idx] for idx, products in enumerate(right)]
+    )
+
+    r_class_of = [0] * len(elements)
+    for class_idx, component in enumerate(r_components):
+        for idx in component:
+            r_class_of[idx] = class_idx
+    h_classes = set()
+    for class_idx, component in enumerate(l_components):
+        for idx in component:
+            h_classes.add((r_class_of[idx], class_idx))
+
+    idempotents = [
+        cls.word
+        for cls in elements
+        if all(
+            image == DEAD or cls.transformation[image] == image
+            for image in cls.transformation
+        )
+    ]
+
+    return GreenStructure(
+        r_classes=words(r_components),
+        l_classes=words(l_components),
+        j_classes=words(j_components),
+        idempotents=idempotents,
+        aperiodic=len(h_classes) == len(elements),
+    )
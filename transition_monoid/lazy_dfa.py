@@ -0,0 +1,166 @@
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from dfa import DFA
+from transition_table import DEAD, word_separator
+
+UNKNOWN = -2
+
+
+class LazyDFA:
+    """Represents a DFA that is determinized from an NFA on the fly.
+
+    Subset states are created only when some word reaches them. Subsets are
+    hash-consed as integer bitsets over NFA states. NFA states that cannot
+    reach a final state are dropped from subsets, so every created subset
+    is a useful state.
+    """
+
+    def __init__(
+        self,
+        states: Set[str],
+        initial_state: str,
+        final_states: Set[str],
+        alphabet: List[str],
+        transitions: Dict[Tuple[str, str], Set[str]],
+    ):
+        self.nfa_states = sorted(states | {initial_state} | final_states)
+        self.nfa_state_ids = {state: idx for idx, state in enumerate(self.nfa_states)}
+        self.initial_state = initial_state
+        self.final_states = final_states
+        self.alphabet = alphabet
+        self.letter_ids = {letter: idx for idx, letter in enumerate(alphabet)}
+        self.width = len(alphabet)
+        self.separator = word_separator(alphabet)
+
+        self.successors: Dict[Tuple[int, int], int] = {}
+        for (in_state, letter), out_states in transitions.items():
+            mask = 0
+            for out_state in out_states:
+                mask |= 1 << self.nfa_state_ids[out_state]
+            in_id = self.nfa_state_ids[in_state]
+            self.successors[in_id, self.letter_ids[letter]] = mask
+        self.final_mask = self._to_mask(final_states)
+        self.undead_mask = self._get_undead_mask(transitions)
+
+        self.subsets: List[int] = []
+        self.subset_ids: Dict[int, int] = {}
+        self.targets: List[int] = []
+        self.names: Dict[str, int] = {}
+        initial_mask = self._to_mask({initial_state}) & self.undead_mask
+        self.initial_id = self._intern(initial_mask) if initial_mask else DEAD
+
+    def _to_mask(self, states):
+        mask = 0
+        for state in states:
+            mask |= 1 << self.nfa_state_ids[state]
+        return mask
+
+    def _get_undead_mask(self, transitions):
+        predecessors = {}
+        for (in_state, _), out_states in transitions.items():
+            for out_state in out_states:
+                predecessors.setdefault(out_state, set()).add(in_state)
+
+        undead = set(self.final_states)
+        states_to_visit = deque(undead)
+        while states_to_visit:
+            for in_state in predecessors.get(states_to_visit.popleft(), ()):
+                if in_state not in undead:
+                    undead.add(in_state)
+                    states_to_visit.append(in_state)
+
+        return self._to_mask(undead)
+
+    def _intern(self, mask):
+        subset_id = self.subset_ids.get(mask)
+        if subset_id is None:
+            subset_id = len(self.subsets)
+            self.subsets.append(mask)
+            self.subset_ids[mask] = subset_id
+            self.targets.extend([UNKNOWN] * self.width)
+            self.names[self.state_name(subset_id)] = subset_id
+        return subset_id
+
+    def state_name(self, subset_id: int) -> str:
+        """Returns the name of a subset state, a plain NFA state name for singletons."""
+        mask = self.subsets[subset_id]
+        names = [
+            state for idx, state in enumerate(self.nfa_states) if mask >> idx & 1
+        ]
+        return names[0] if len(names) == 1 else "{" + ", ".join(names) + "}"
+
+    def step(self, subset_id: int, letter_id: int) -> int:
+        """Returns the subset reached by one letter, creating it if needed."""
+        target = self.targets[subset_id * self.width + letter_id]
+        if target == UNKNOWN:
+            mask, subset = 0, self.subsets[subset_id]
+            while subset:
+                lowest = subset & -subset
+                mask |= self.successors.get((lowest.bit_length() - 1, letter_id), 0)
+                subset ^= lowest
+            mask &= self.undead_mask
+            target = self._intern(mask) if mask else DEAD
+            self.targets[subset_id * self.width + letter_id] = target
+        return target
+
+    def split_word(self, word: Sequence[str]) -> Sequence[str]:
+        """Returns the letters of the word given as a string or as letters."""
+        if isinstance(word, str) and self.separator and word:
+            return word.split(self.separator)
+        return word
+
+    def run(self, subset_id: int, word: Sequence[str]) -> int:
+        """Returns the id of the subset reached from the given one by the word."""
+        for letter in self.split_word(word):
+            letter_id = self.letter_ids.get(letter)
+            if subset_id == DEAD or letter_id is None:
+                return DEAD
+            subset_id = self.step(subset_id, letter_id)
+        return subset_id
+
+    def reach_from_state(self, state: str, word: Sequence[str]) -> Optional[str]:
+        """Returns state that can be reached from the given state by the given word."""
+        if not word:
+            return state
+        subset_id = self.run(self.names.get(state, DEAD), word)
+        return None if subset_id == DEAD else self.state_name(subset_id)
+
+    def accepts(self, word: Sequence[str]) -> bool:
+        """Checks whether the automaton accepts given word."""
+        subset_id = self.run(self.initial_id, word)
+        return subset_id != DEAD and bool(self.subsets[subset_id] & self.final_mask)
+
+    def to_dfa(self) -> DFA:
+        """Returns the DFA of all subsets reachable from the initial one."""
+        if self.initial_id == DEAD:
+            return DFA.from_transitions({self.initial_state}, self.initial_state,
+                                        set(), self.alphabet, {})
+
+        visited = {self.initial_id}
+        subsets_to_visit = deque([self.initial_id])
+        while subsets_to_visit:
+            subset_id = subsets_to_visit.popleft()
+            for letter_id in range(self.width):
+                target = self.step(subset_id, letter_id)
+                if target != DEAD and target not in visited:
+                    visited.add(target)
+                    subsets_to_visit.append(target)
+
+        states = {self.state_name(subset_id) for subset_id in visited}
+        transitions = {}
+        for subset_id in visited:
+            for letter_id, letter in enumerate(self.alphabet):
+                target = self.targets[subset_id * self.width + letter_id]
+                if target != DEAD:
+                    transitions[self.state_name(subset_id), letter] = (
+                        self.state_name(target)
+                    )
+
+        final_states = {
+            self.state_name(subset_id)
+            for subset_id in visited
+            if self.subsets[subset_id] & self.final_mask
+        }
+        return DFA.from_transitions(states, self.state_name(self.initial_id),
+                                    final_states, self.alphabet, transitions)
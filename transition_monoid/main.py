@@ -1,8 +1,19 @@
 import argparse
 
 from dfa_parser import Parser
+from froidure_pin import EnumerationLimits
+from green import analyze_green_relations
+from lazy_dfa import LazyDFA
 from monoid import EquivalenceClass, TransitionMonoid
-from utils import print_monoid_details, print_myhill_nerode_details
+from monoid_cache import MonoidCache
+from utils import (
+    print_found,
+    print_green_details,
+    print_monoid_details,
+    print_myhill_nerode_details,
+    print_statistics,
+    print_sync_word_details,
+)
 
 
 def main():
@@ -16,25 +27,92 @@ def main():
         action="store_true",
         help="Whether to print Myhill–Nerode equivalence classes.",
     )
+    parser.add_argument(
+        "-sw",
+        "--sync_word",
+        action="store_true",
+        help="Whether to print the shortest synchronizing word.",
+    )
+    parser.add_argument(
+        "-g",
+        "--green",
+        action="store_true",
+        help="Whether to print Green's relations and check aperiodicity.",
+    )
+    parser.add_argument(
+        "-s",
+        "--stream",
+        action="store_true",
+        help="Whether to print classes and rewriting rules as soon as they are "
+        "found instead of the full report.",
+    )
+    parser.add_argument(
+        "--max_classes", type=int, help="Stop once more than this many classes are found."
+    )
+    parser.add_argument(
+        "--max_memory", type=int, help="Stop when peak memory exceeds this many MB."
+    )
+    parser.add_argument(
+        "--max_seconds", type=float, help="Stop after this many seconds."
+    )
+    parser.add_argument(
+        "-p",
+        "--processes",
+        type=int,
+        help="Number of processes to build the monoid with, level by level.",
+    )
+    parser.add_argument(
+        "--cache", help="Directory to keep built monoids in between runs."
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=256,
+        help="Size of the cache directory in MB after which old entries are removed.",
+    )
     args = parser.parse_args()
 
-    with open(args.file_path, mode="r", encoding="utf-8") as file:
-        lines = file.readlines()
-
-    parser = Parser()
-    dfa = parser.parse_dfa(lines)
+    automaton = Parser().load(args.file_path)
+    dfa = automaton.to_dfa() if isinstance(automaton, LazyDFA) else automaton
 
     if not dfa:
         print("Incorrect data. DFA is not DFA actually.")
     else:
         monoid = TransitionMonoid()
-        monoid.build(dfa)
+        limits = EnumerationLimits(
+            max_elements=args.max_classes,
+            max_memory=args.max_memory * 2**20 if args.max_memory else None,
+            max_seconds=args.max_seconds,
+        )
+        if args.stream:
+            for found in monoid.build_incrementally(dfa, limits):
+                print_found(found)
+            print_statistics(monoid.statistics)
+            return
+
+        cache = MonoidCache(args.cache, args.cache_size * 2**20) if args.cache else None
+        cached = cache.load(dfa) if cache else None
+        if cached:
+            monoid = cached
+        elif args.processes:
+            monoid.build_parallel(dfa, args.processes, limits=limits)
+        else:
+            for _ in monoid.build_incrementally(dfa, limits):
+                pass
+        if cache and not cached:
+            cache.store(dfa, monoid)
+        if not monoid.statistics.complete:
+            print_statistics(monoid.statistics)
+            return
         print_monoid_details(monoid, dfa)
         if args.myhill_nerode:
-            classes = [
-                EquivalenceClass(word="", pairs={(s, s) for s in dfa.useful_states})
-            ] + monoid.classes
+            classes = [EquivalenceClass.identity(dfa)] + monoid.classes
             print_myhill_nerode_details(classes, dfa)
+        if args.sync_word:
+            print_sync_word_details(dfa)
+        if args.green:
+            minimal = len(dfa.minimize()[0].states) == len(dfa.useful_states)
+            print_green_details(analyze_green_relations(monoid, dfa), minimal)
 
 
 if __name__ == "__main__":
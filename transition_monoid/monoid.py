@@ -1,54 +1,367 @@
-from dataclasses import dataclass
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from queue import Queue
-from typing import Set, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 
 from dfa import DFA
+from froidure_pin import (
+    EMPTY,
+    EnumerationLimits,
+    EnumerationStatistics,
+    FroidurePin,
+)
+from transition_table import DEAD, TransitionTable
 
 
 @dataclass
 class EquivalenceClass:
-    """Represents an equivalence class in transition monoid."""
+    """Represents an equivalence class in transition monoid.
+
+    The transformation holds the image of each useful state of the DFA
+    (by its index in `states`) or `DEAD` if the state leaves useful ones.
+    """
 
     word: str
-    pairs: Set[Tuple[str, str]]
+    transformation: Tuple[int, ...]
+    states: List[str] = field(repr=False, compare=False)
+
+    @property
+    def pairs(self) -> Set[Tuple[str, str]]:
+        return {
+            (self.states[in_id], self.states[out_id])
+            for in_id, out_id in enumerate(self.transformation)
+            if out_id != DEAD
+        }
+
+    def synchronizing_state(self) -> Optional[str]:
+        """Returns the state to which the word synchronizes the DFA."""
+        images = set(self.transformation)
+        if len(images) == 1 and DEAD not in images:
+            return self.states[images.pop()]
+        return None
+
+    @staticmethod
+    def identity(dfa: DFA) -> "EquivalenceClass":
+        """Returns the class of the empty word."""
+        states = dfa.useful_table.states
+        return EquivalenceClass("", tuple(range(len(states))), states)
+
+
+_worker_table = None
+
+
+def _init_worker(table):
+    global _worker_table
+    _worker_table = table
+
+
+def _expand(transformations):
+    return [
+        [
+            _worker_table.apply(transformation, letter_id)
+            for letter_id in range(_worker_table.width)
+        ]
+        for transformation in transformations
+    ]
+
+
+class SuffixIndex:
+    """Represents a trie of reversed words that matches them as suffixes."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, word: Sequence[str]) -> None:
+        """Adds a word to the index."""
+        node = self.root
+        for letter in reversed(word):
+            node = node.setdefault(letter, {})
+        node[None] = True
+
+    def matches_suffix(self, word: Sequence[str]) -> bool:
+        """Checks whether some indexed word is a suffix of the given word."""
+        node = self.root
+        for letter in reversed(word):
+            node = node.get(letter)
+            if node is None:
+                return False
+            if None in node:
+                return True
+        return False
 
 
 class TransitionMonoid:
     """Represents transition monoid."""
 
     def __init__(self):
+        self._reset()
+
+    def _reset(self):
         self.rewriting_rules = {}
         self.classes = []
+        self._classes_by_transformation: Dict[Tuple[int, ...], EquivalenceClass] = {}
+        self._rules_index = SuffixIndex()
+        self.right_cayley_graph: List[List[int]] = []
+        self.left_cayley_graph: List[List[int]] = []
+        self._prefixes: List[int] = []
+        self._last_letters: List[int] = []
+        self.statistics = EnumerationStatistics()
+
+    @classmethod
+    def from_parts(
+        cls,
+        classes: List[EquivalenceClass],
+        prefixes: List[int],
+        last_letters: List[int],
+        rewriting_rules: Dict[str, str],
+        right_cayley_graph: List[List[int]],
+        left_cayley_graph: List[List[int]],
+        statistics: EnumerationStatistics,
+    ) -> "TransitionMonoid":
+        """Returns a monoid of built parts, such as saved by a cache."""
+        monoid = cls()
+        monoid.classes = classes
+        monoid._classes_by_transformation = {
+            equivalence_class.transformation: equivalence_class
+            for equivalence_class in classes
+        }
+        monoid._prefixes = prefixes
+        monoid._last_letters = last_letters
+        monoid.rewriting_rules = rewriting_rules
+        monoid.right_cayley_graph = right_cayley_graph
+        monoid.left_cayley_graph = left_cayley_graph
+        monoid.statistics = statistics
+        return monoid
+
+    def prefixes_and_letters(self) -> Tuple[List[int], List[int]]:
+        """Returns the prefix class and the last letter id of each class word.
+
+        The prefix class is `EMPTY` for words of one letter.
+        """
+        return self._prefixes, self._last_letters
 
     @staticmethod
-    def _update_candidates(candidates, word, pairs, dfa):
-        for letter in dfa.alphabet:
-            new_pairs = set()
-            for pair in pairs:
-                out_state = dfa.transitions.get((pair[1], letter), "")
-                if out_state in dfa.useful_states:
-                    new_pairs.add((pair[0], out_state))
-            candidates.put(EquivalenceClass(word + letter, new_pairs))
+    def _update_candidates(
+        candidates, idx, word, transformation, table: TransitionTable
+    ):
+        for letter_id, letter in enumerate(table.letters):
+            candidates.put(
+                (
+                    idx,
+                    letter_id,
+                    EquivalenceClass(
+                        table.append_letter(word, letter),
+                        table.apply(transformation, letter_id),
+                        table.states,
+                    ),
+                )
+            )
 
     def build(self, dfa: DFA) -> None:
-        """Builds a transition monoid according to a given DFA."""
+        """Builds a transition monoid according to a given DFA.
+
+        Uses the Froidure-Pin algorithm, which also fills the right and the left
+        Cayley graphs: `right_cayley_graph[i][a]` and `left_cayley_graph[i][a]`
+        are the indices of the classes of `classes[i].word + a` and
+        `a + classes[i].word`, where `a` is a letter of `dfa.alphabet`.
+        """
+        for _ in self.build_incrementally(dfa):
+            pass
+
+    def build_incrementally(
+        self, dfa: DFA, limits: Optional[EnumerationLimits] = None
+    ) -> Iterator[Union[EquivalenceClass, Tuple[str, str]]]:
+        """Builds a transition monoid, yielding classes and rules once found.
+
+        Rewriting rules are yielded as pairs of their sides. Building stops
+        when some of the limits is exceeded, then `statistics` describe
+        the partial monoid built so far.
+        """
+        engine = FroidurePin(dfa.useful_table)
+        states = dfa.useful_table.states
+        self.classes = []
+        self._classes_by_transformation = {}
+        self.rewriting_rules = {}
+        self.right_cayley_graph = engine.right
+        self.left_cayley_graph = engine.left
+        self._prefixes = engine.prefix
+        self._last_letters = engine.last
+
+        for kind, idx in engine.enumerate(limits):
+            if kind == "element":
+                cls = EquivalenceClass(
+                    engine.words[idx], engine.transformations[idx], states
+                )
+                self.classes.append(cls)
+                self._classes_by_transformation[cls.transformation] = cls
+                yield cls
+            else:
+                in_idx, letter_id, product = engine.rules[idx]
+                rule = engine.rule_word(in_idx, letter_id), engine.words[product]
+                self.rewriting_rules[rule[0]] = rule[1]
+                yield rule
+
+        self.statistics = engine.statistics
+
+    def multiplication_table(self) -> List[array]:
+        """Returns the table of products of classes built by `build`.
+
+        The entry `[i][j]` is the index of the class of
+        `classes[i].word + classes[j].word`. Each entry is one step in
+        the right Cayley graph from the entry of the prefix of `classes[j].word`.
+        """
+        table = []
+        for idx in range(len(self.classes)):
+            row = array("i", [EMPTY]) * len(self.classes)
+            for other_idx, (prefix, letter_id) in enumerate(
+                zip(self._prefixes, self._last_letters)
+            ):
+                left = idx if prefix == EMPTY else row[prefix]
+                row[other_idx] = self.right_cayley_graph[left][letter_id]
+            table.append(row)
+        return table
+
+    def accepting(self, dfa: DFA) -> List[bool]:
+        """Returns whether the DFA accepts the word of each class."""
+        initial_id = dfa.useful_table.state_ids.get(dfa.initial_state, DEAD)
+        if initial_id == DEAD:
+            return [False] * len(self.classes)
+        final_ids = {
+            dfa.useful_table.state_ids[state]
+            for state in dfa.final_states & dfa.useful_states
+        }
+        return [cls.transformation[initial_id] in final_ids for cls in self.classes]
+
+    def build_breadth_first(self, dfa: DFA) -> None:
+        """Builds a transition monoid by a breadth-first search over words.
+
+        Every candidate extends the word of an already found class by one letter.
+        Class words contain no left side of a rewriting rule, so a candidate
+        is reducible only if some left side is its suffix. A reducible
+        candidate has the transformation of a class found before it, which
+        fills the right Cayley graph used by `multiplication_table`.
+        """
+        table = dfa.useful_table
+        self._reset()
+        indices = {}
         candidates = Queue()
         self._update_candidates(
-            candidates, word="", pairs={(s, s) for s in dfa.useful_states}, dfa=dfa
+            candidates,
+            idx=EMPTY,
+            word="",
+            transformation=EquivalenceClass.identity(dfa).transformation,
+            table=table,
         )
 
         while not candidates.empty():
-            candidate = candidates.get()
-            if all(
-                rule_left not in candidate.word for rule_left in self.rewriting_rules
-            ):
-                same_class = next(
-                    (cls for cls in self.classes if cls.pairs == candidate.pairs), None
+            idx, letter_id, candidate = candidates.get()
+            product = indices.get(candidate.transformation)
+            if product is None:
+                product = len(self.classes)
+                self.classes.append(candidate)
+                self._classes_by_transformation[candidate.transformation] = candidate
+                self._prefixes.append(idx)
+                self._last_letters.append(letter_id)
+                self.right_cayley_graph.append([EMPTY] * table.width)
+                indices[candidate.transformation] = product
+                self._update_candidates(
+                    candidates,
+                    idx=product,
+                    word=candidate.word,
+                    transformation=candidate.transformation,
+                    table=table,
                 )
-                if same_class:
-                    self.rewriting_rules[candidate.word] = same_class.word
-                else:
-                    self.classes.append(candidate)
-                    self._update_candidates(
-                        candidates, word=candidate.word, pairs=candidate.pairs, dfa=dfa
-                    )
+            else:
+                letters = table.split_word(candidate.word)
+                if not self._rules_index.matches_suffix(letters):
+                    self.rewriting_rules[candidate.word] = self.classes[product].word
+                    self._rules_index.add(letters)
+            if idx != EMPTY:
+                self.right_cayley_graph[idx][letter_id] = product
+
+    def build_parallel(
+        self,
+        dfa: DFA,
+        processes: Optional[int] = None,
+        chunk_size: int = 256,
+        limits: Optional[EnumerationLimits] = None,
+    ) -> None:
+        """Builds a transition monoid, expanding levels of words in a process pool.
+
+        Workers receive the transition table once and compute transformations
+        of all words one letter longer than the current level. The results
+        are merged in the order of the sequential breadth-first search, so
+        classes and rules are the same as those of `build`. The right Cayley
+        graph is filled as well, the left one is not. Limits are checked after
+        each merged class, then `statistics` describe the partial monoid.
+        """
+        limits = limits or EnumerationLimits()
+        started = time.monotonic()
+        table = dfa.useful_table
+        self._reset()
+        indices = {}
+        level = [EMPTY]
+        transformations = {EMPTY: EquivalenceClass.identity(dfa).transformation}
+        stopped_by = None
+
+        executor = ProcessPoolExecutor(
+            processes, initializer=_init_worker, initargs=(table,)
+        )
+        try:
+            while level and not stopped_by:
+                chunks = [
+                    [transformations[idx] for idx in level[start : start + chunk_size]]
+                    for start in range(0, len(level), chunk_size)
+                ]
+                images = (
+                    transformation_images
+                    for chunk_images in executor.map(_expand, chunks)
+                    for transformation_images in chunk_images
+                )
+
+                next_level = []
+                for idx, transformation_images in zip(level, images):
+                    word = "" if idx == EMPTY else self.classes[idx].word
+                    if idx != EMPTY:
+                        self.right_cayley_graph.append([EMPTY] * table.width)
+                    for letter_id, transformation in enumerate(transformation_images):
+                        new_word = table.append_letter(word, table.letters[letter_id])
+                        letters = table.split_word(new_word)
+                        product = indices.get(transformation)
+                        if product is not None:
+                            if not self._rules_index.matches_suffix(letters):
+                                rule_right = self.classes[product].word
+                                self.rewriting_rules[new_word] = rule_right
+                                self._rules_index.add(letters)
+                        else:
+                            product = len(self.classes)
+                            cls = EquivalenceClass(
+                                new_word, transformation, table.states
+                            )
+                            self.classes.append(cls)
+                            self._classes_by_transformation[transformation] = cls
+                            self._prefixes.append(idx)
+                            self._last_letters.append(letter_id)
+                            indices[transformation] = product
+                            transformations[product] = transformation
+                            next_level.append(product)
+                        if idx != EMPTY:
+                            self.right_cayley_graph[idx][letter_id] = product
+                    stopped_by = limits.exceeded(len(self.classes), started)
+                    if stopped_by:
+                        break
+                transformations = {idx: transformations[idx] for idx in next_level}
+                level = next_level
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        last_word = self.classes[-1].word if self.classes else ""
+        self.statistics = EnumerationStatistics(
+            elements=len(self.classes),
+            rules=len(self.rewriting_rules),
+            word_length=len(table.split_word(last_word)),
+            seconds=time.monotonic() - started,
+            stopped_by=stopped_by,
+        )
@@ -0,0 +1,265 @@
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from typing import List, Optional
+
+from dfa import DFA
+from froidure_pin import EMPTY, EnumerationStatistics
+from monoid import EquivalenceClass, TransitionMonoid
+from transition_table import DEAD
+
+MAGIC = b"TMC1"
+HEADER = struct.Struct("<4sIIIIB")
+SUFFIX = ".monoid"
+
+
+def canonical_order(dfa: DFA) -> List[int]:
+    """Returns useful state ids in the order of a breadth-first search.
+
+    The search starts in the initial state and follows letters in their
+    sorted order, so isomorphic DFAs get the same numbering of states.
+    """
+    table = dfa.useful_table
+    initial_id = table.state_ids.get(dfa.initial_state, DEAD)
+    if initial_id == DEAD:
+        return []
+    order = [initial_id]
+    seen = {initial_id}
+    for state_id in order:
+        for letter_id in range(table.width):
+            target = table.step(state_id, letter_id)
+            if target != DEAD and target not in seen:
+                seen.add(target)
+                order.append(target)
+    return order
+
+
+class MonoidCache:
+    """Represents a directory of built monoids keyed by canonical DFA hashes.
+
+    The key covers the alphabet and the useful transitions renumbered by
+    `canonical_order`, which is all the monoid depends on. Entries are
+    written to a temporary file and renamed, so processes sharing the
+    directory never see a partial entry. When the directory grows over
+    `max_size` bytes, the least recently used entries are removed.
+    """
+
+    def __init__(self, directory: str, max_size: int = 256 * 2**20):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(dfa: DFA) -> str:
+        """Returns the hash of the canonical form of the useful part of the DFA."""
+        table = dfa.useful_table
+        order = canonical_order(dfa)
+        position = {state_id: pos for pos, state_id in enumerate(order)}
+        canonical = array(
+            "i",
+            [
+                position.get(table.step(state_id, letter_id), DEAD)
+                for state_id in order
+                for letter_id in range(table.width)
+            ],
+        )
+        digest = hashlib.sha256()
+        digest.update("\0".join(table.letters).encode())
+        digest.update(struct.pack("<II", len(order), table.width))
+        digest.update(_little_endian(canonical))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def load(self, dfa: DFA) -> Optional[TransitionMonoid]:
+        """Returns the cached monoid of the DFA or None if there is no entry."""
+        path = self._path(self.key(dfa))
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        try:
+            return _decode(data, dfa)
+        except (ValueError, IndexError, KeyError, struct.error, zlib.error):
+            _remove(path)
+            return None
+
+    def store(self, dfa: DFA, monoid: TransitionMonoid) -> None:
+        """Saves a completely built monoid of the DFA and evicts old entries."""
+        if not monoid.statistics.complete:
+            return
+        data = _encode(dfa, monoid)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self._path(self.key(dfa)))
+        except BaseException:
+            _remove(temporary)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the cache fits its size."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_size:
+                break
+            _remove(os.path.join(self.directory, name))
+            total -= size
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _encode(dfa: DFA, monoid: TransitionMonoid) -> bytes:
+    """Packs classes, rules and Cayley graphs in canonical state numbering.
+
+    Class words are kept as prefix classes and last letters, rules as
+    the class and the letter of their left side and the class of their right
+    side. The multiplication table follows from these and the right graph.
+    """
+    table = dfa.useful_table
+    order = canonical_order(dfa)
+    position = {state_id: pos for pos, state_id in enumerate(order)}
+    indices = {cls.word: idx for idx, cls in enumerate(monoid.classes)}
+    indices[""] = EMPTY
+
+    prefixes, last_letters = monoid.prefixes_and_letters()
+    values = array("i", prefixes)
+    values.extend(last_letters)
+    for cls in monoid.classes:
+        values.extend(
+            DEAD if image == DEAD else position[image]
+            for image in (cls.transformation[state_id] for state_id in order)
+        )
+    for graph in (monoid.right_cayley_graph, monoid.left_cayley_graph):
+        for products in graph:
+            values.extend(products)
+    for left, right in monoid.rewriting_rules.items():
+        letters = table.split_word(left)
+        values.append(indices[table.separator.join(letters[:-1])])
+        values.append(table.letter_ids[letters[-1]])
+        values.append(indices[right])
+
+    header = HEADER.pack(
+        MAGIC,
+        len(order),
+        table.width,
+        len(monoid.classes),
+        len(monoid.rewriting_rules),
+        bool(monoid.left_cayley_graph),
+    )
+    return header + zlib.compress(_little_endian(values))
+
+
+def _decode(data: bytes, dfa: DFA) -> TransitionMonoid:
+    """Unpacks a monoid saved by `_encode` for a DFA with the same key."""
+    table = dfa.useful_table
+    magic, size, width, elements, rules, has_left = HEADER.unpack_from(data)
+    if magic != MAGIC or width != table.width:
+        raise ValueError("Unknown cache entry format.")
+    values = array("i")
+    values.frombytes(zlib.decompress(data[HEADER.size :]))
+    if sys.byteorder != "little":
+        values.byteswap()
+    graphs = 2 if has_left else 1
+    if len(values) != elements * (2 + size + graphs * width) + 3 * rules:
+        raise ValueError("Truncated cache entry.")
+
+    order = canonical_order(dfa)
+    if size != len(order):
+        raise ValueError("Cache entry of another DFA.")
+    positions = sorted(range(size), key=order.__getitem__)
+    # The last item maps DEAD, which is -1, back to itself.
+    images = order + [DEAD]
+    prefixes = values[:elements].tolist()
+    last_letters = values[elements : 2 * elements].tolist()
+    offset = 2 * elements
+    classes = []
+
+    for idx in range(elements):
+        canonical = values[offset : offset + size]
+        offset += size
+        prefix, letter_id = prefixes[idx], last_letters[idx]
+        _check_range(canonical, DEAD, size)
+        if not EMPTY <= prefix < idx or not 0 <= letter_id < width:
+            raise ValueError("Corrupt cache entry.")
+        transformation = tuple(images[canonical[pos]] for pos in positions)
+        word = table.append_letter(
+            "" if prefix == EMPTY else classes[prefix].word, table.letters[letter_id]
+        )
+        classes.append(EquivalenceClass(word, transformation, table.states))
+
+    right_cayley_graph, left_cayley_graph = [], []
+    for graph in (right_cayley_graph, left_cayley_graph)[:graphs]:
+        for _ in range(elements):
+            products = values[offset : offset + width]
+            offset += width
+            _check_range(products, 0, elements)
+            graph.append(products.tolist())
+
+    rewriting_rules = {}
+    for _ in range(rules):
+        idx, letter_id, product = values[offset : offset + 3]
+        offset += 3
+        if (
+            not EMPTY <= idx < elements
+            or not 0 <= letter_id < width
+            or not 0 <= product < elements
+        ):
+            raise ValueError("Corrupt cache entry.")
+        word = "" if idx == EMPTY else classes[idx].word
+        left = table.append_letter(word, table.letters[letter_id])
+        rewriting_rules[left] = classes[product].word
+
+    statistics = EnumerationStatistics(
+        elements=elements,
+        rules=rules,
+        word_length=max(
+            (len(table.split_word(cls.word)) for cls in classes), default=0
+        ),
+    )
+    return TransitionMonoid.from_parts(
+        classes,
+        prefixes,
+        last_letters,
+        rewriting_rules,
+        right_cayley_graph,
+        left_cayley_graph,
+        statistics,
+    )
+
+
+def _check_range(values: array, low: int, high: int) -> None:
+    """Raises ValueError if some value is out of the range from low to high."""
+    if values and (min(values) < low or max(values) >= high):
+        raise ValueError("Corrupt cache entry.")
@@ -0,0 +1,61 @@
+from itertools import islice
+from typing import Sequence
+
+from transition_table import DEAD, TransitionTable
+
+
+class PrefixCache:
+    """Represents a bounded cache of words read from one state of a DFA.
+
+    A word asked before is answered by a single lookup. Other words are
+    read through the table, resuming from the state of the word without
+    its last letter if that word is cached, which covers words growing
+    letter by letter. Entries are kept in least recently used order and
+    evicted by chunks of an eighth of the capacity.
+    """
+
+    def __init__(self, table: TransitionTable, state_id: int, capacity: int):
+        self.table = table
+        self.capacity = capacity
+        self.state_id = state_id
+        self.hits = 0
+        self.misses = 0
+        self._states = {}
+
+    def __len__(self):
+        return len(self._states)
+
+    def reach(self, word: Sequence[str]) -> int:
+        """Returns the id of the state reached by the word from the cached one.
+
+        The word is given as a string or as a sequence of letters, a string
+        is split into letters only if it was not asked before.
+        """
+        key = word if isinstance(word, str) else tuple(word)
+        states = self._states
+        state_id = states.pop(key, None)
+        if state_id is not None:
+            self.hits += 1
+            states[key] = state_id
+            return state_id
+
+        self.misses += 1
+        table = self.table
+        letters = table.split_word(word)
+        state_id = None
+        if len(letters) > 1:
+            if isinstance(key, tuple):
+                state_id = states.get(key[:-1])
+            else:
+                state_id = states.get(key[: len(key) - len(letters[-1]) - len(table.separator)])
+        if state_id is None:
+            state_id = table.run(self.state_id, letters)
+        elif state_id != DEAD:
+            state_id = table.run(state_id, letters[-1:])
+
+        if len(states) >= self.capacity:
+            for old_key in list(islice(states, max(1, self.capacity // 8))):
+                del states[old_key]
+        if self.capacity > 0:
+            states[key] = state_id
+        return state_id
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+TESTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(TESTS.parent))
+
+from dfa_parser import Parser
+from lazy_dfa import LazyDFA
+
+
+def load(name):
+    return Parser().load(str(TESTS / name))
+
+
+def test_accepts_multi_character_letters():
+    dfa = load("test07.txt")
+    assert dfa.accepts("")
+    assert dfa.accepts("start stop")
+    assert dfa.accepts("start tick tick stop reset")
+    assert dfa.accepts(["start", "stop"])
+    assert not dfa.accepts("start")
+    assert not dfa.accepts("stop")
+    assert not dfa.accepts("st")
+
+
+def test_reach_from_state_multi_character_letters():
+    dfa = load("test07.txt")
+    assert dfa.reach_from_state("idle", "start") == "busy"
+    assert dfa.reach_from_state("idle", "start tick stop") == "done"
+    assert dfa.reach_from_state("idle", ["start", "stop", "reset"]) == "idle"
+    assert dfa.reach_from_state("idle", "stop") is None
+
+
+def test_sync_from_word_multi_character_letters():
+    dfa = load("test07.txt")
+    assert dfa.sync_from_word("start tick") is None
+
+    dfa = Parser().parse_dfa(
+        [
+            "<p, {q}>\n",
+            "<p, go> -> q\n",
+            "<q, go> -> q\n",
+            "<p, back> -> p\n",
+            "<q, back> -> p\n",
+        ]
+    )
+    assert dfa.sync_from_word("go") == "q"
+    assert dfa.sync_from_word("go back") == "p"
+    assert dfa.sync_from_word(["back", "go"]) == "q"
+
+
+def test_accepts_many_multi_character_letters():
+    dfa = load("test07.txt")
+    words = ["start stop", "start", "", ["start", "tick", "stop"], "idle"]
+    expected = [1, 0, 1, 1, 0]
+    assert list(dfa.accepts_many(words)) == expected
+    assert list(dfa.accepts_many(words, processes=2, chunk_size=2)) == expected
+    chunks = list(dfa.iter_accepts(words, chunk_size=2))
+    assert [list(chunk) for chunk in chunks] == [[1, 0], [1, 1], [0]]
+
+
+def test_accepts_file_multi_character_letters(tmp_path):
+    dfa = load("test07.txt")
+    path = tmp_path / "words.txt"
+    path.write_text("start stop\nstart\n\nstart tick stop reset\n")
+    assert list(dfa.accepts_file(str(path))) == [1, 0, 1, 1]
+
+
+def test_interleaved_iter_accepts_use_their_own_dfa():
+    accepting = load("test07.txt")
+    rejecting = Parser().parse_dfa(["<idle, {done}>\n", "<idle, start> -> idle\n"])
+    first = accepting.iter_accepts(["start stop", "start stop"], chunk_size=1)
+    second = rejecting.iter_accepts(["start stop"], chunk_size=1)
+
+    assert list(next(first)) == [1]
+    assert list(next(second)) == [0]
+    assert list(next(first)) == [1]
+
+
+def test_iter_accepts_in_pool_reads_words_lazily():
+    dfa = load("test07.txt")
+    read = []
+
+    def words():
+        for idx in range(100):
+            read.append(idx)
+            yield "start stop"
+
+    chunks = dfa.iter_accepts(words(), processes=2, chunk_size=1)
+    assert list(next(chunks)) == [1]
+    assert len(read) <= 5
+    assert sum(len(chunk) for chunk in chunks) == 99
+
+
+def test_lazy_dfa_multi_character_letters():
+    lines = ["<idle, {done}>\n", "<idle, start> -> busy\n", "<idle, start> -> done\n"]
+    nfa = Parser().parse_automaton(lines)
+
+    assert isinstance(nfa, LazyDFA)
+    assert Parser().parse_dfa(lines[:1] + lines[2:]).accepts("start")
+    assert nfa.accepts("start")
+    assert nfa.accepts(["start"])
+    assert not nfa.accepts("start start")
+    assert nfa.reach_from_state("idle", "start") == "done"
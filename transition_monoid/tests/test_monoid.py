@@ -0,0 +1,95 @@
+import sys
+from pathlib import Path
+
+TESTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(TESTS.parent))
+
+from dfa_parser import Parser
+from froidure_pin import EnumerationLimits
+from monoid import TransitionMonoid
+
+
+def load(name):
+    return Parser().load(str(TESTS / name))
+
+
+def test_build_parallel_matches_build():
+    dfa = load("test07.txt")
+    sequential, parallel = TransitionMonoid(), TransitionMonoid()
+    sequential.build(dfa)
+    parallel.build_parallel(dfa, processes=2)
+
+    assert [cls.word for cls in parallel.classes] == [
+        cls.word for cls in sequential.classes
+    ]
+    assert parallel.rewriting_rules == sequential.rewriting_rules
+    assert parallel.statistics.complete
+    assert parallel.statistics.elements == sequential.statistics.elements
+    assert parallel.statistics.rules == sequential.statistics.rules
+    assert parallel.statistics.word_length == sequential.statistics.word_length
+
+
+def test_build_parallel_stops_at_limits():
+    dfa = load("test07.txt")
+    limits = EnumerationLimits(max_elements=5)
+    sequential, parallel = TransitionMonoid(), TransitionMonoid()
+    for _ in sequential.build_incrementally(dfa, limits):
+        pass
+    parallel.build_parallel(dfa, processes=2, limits=limits)
+
+    assert parallel.statistics.stopped_by == "size"
+    assert parallel.statistics.elements == sequential.statistics.elements
+    assert parallel.statistics.rules == sequential.statistics.rules
+
+
+def test_build_parallel_resets_previous_build():
+    dfa = load("test07.txt")
+    monoid = TransitionMonoid()
+    monoid.build_parallel(dfa, processes=2, limits=EnumerationLimits(max_elements=5))
+    monoid.build_parallel(dfa, processes=2)
+    expected = TransitionMonoid()
+    expected.build(dfa)
+
+    assert [cls.word for cls in monoid.classes] == [cls.word for cls in expected.classes]
+    assert monoid.statistics.complete
+
+
+def test_time_and_memory_limits_are_checked_while_seeding_generators():
+    dfa = load("test07.txt")
+    for limits in EnumerationLimits(max_seconds=0), EnumerationLimits(max_memory=1):
+        monoid = TransitionMonoid()
+        for _ in monoid.build_incrementally(dfa, limits):
+            pass
+
+        assert not monoid.statistics.complete
+        assert monoid.statistics.elements == 1
+
+
+def test_size_limit_equal_to_monoid_size_completes():
+    dfa = load("test01.txt")
+    expected = TransitionMonoid()
+    expected.build(dfa)
+    size = len(expected.classes)
+
+    for max_elements, complete in (size, True), (size - 1, False):
+        limits = EnumerationLimits(max_elements=max_elements)
+        sequential, parallel = TransitionMonoid(), TransitionMonoid()
+        for _ in sequential.build_incrementally(dfa, limits):
+            pass
+        parallel.build_parallel(dfa, processes=2, limits=limits)
+
+        assert sequential.statistics.complete == complete
+        assert parallel.statistics.complete == complete
+
+
+def test_build_breadth_first_fills_multiplication_table():
+    dfa = load("test07.txt")
+    breadth_first, expected = TransitionMonoid(), TransitionMonoid()
+    breadth_first.build_breadth_first(dfa)
+    expected.build(dfa)
+
+    assert [cls.word for cls in breadth_first.classes] == [
+        cls.word for cls in expected.classes
+    ]
+    assert breadth_first.rewriting_rules == expected.rewriting_rules
+    assert breadth_first.multiplication_table() == expected.multiplication_table()
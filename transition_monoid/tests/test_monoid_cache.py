@@ -0,0 +1,51 @@
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+TESTS = Path(__file__).resolve().parent
+sys.path.insert(0, str(TESTS.parent))
+
+from dfa_parser import Parser
+from monoid import TransitionMonoid
+from monoid_cache import HEADER, MonoidCache
+
+
+def load(name):
+    return Parser().load(str(TESTS / name))
+
+
+def built(dfa):
+    monoid = TransitionMonoid()
+    monoid.build(dfa)
+    return monoid
+
+
+def test_load_returns_stored_monoid(tmp_path):
+    dfa = load("test07.txt")
+    monoid = built(dfa)
+    cache = MonoidCache(str(tmp_path))
+    cache.store(dfa, monoid)
+    loaded = cache.load(dfa)
+
+    assert [cls.word for cls in loaded.classes] == [cls.word for cls in monoid.classes]
+    assert loaded.rewriting_rules == monoid.rewriting_rules
+    assert loaded.multiplication_table() == monoid.multiplication_table()
+
+
+def test_load_drops_entries_with_corrupt_content(tmp_path):
+    dfa = load("test07.txt")
+    cache = MonoidCache(str(tmp_path))
+    cache.store(dfa, built(dfa))
+    path = tmp_path / (cache.key(dfa) + ".monoid")
+    data = path.read_bytes()
+    values = array("i")
+    values.frombytes(zlib.decompress(data[HEADER.size :]))
+
+    for idx in range(len(values)):
+        for value in (-7, len(values)):
+            corrupt = array("i", values)
+            corrupt[idx] = value
+            path.write_bytes(data[: HEADER.size] + zlib.compress(corrupt.tobytes()))
+            assert cache.load(dfa) is None
+            assert not path.exists()
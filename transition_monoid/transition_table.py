@@ -0,0 +1,144 @@
+from array import array
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+DEAD = -1
+
+
+def word_separator(letters: Iterable[str]) -> str:
+    """Returns the separator of letters in words, empty for one-character letters."""
+    return "" if all(len(letter) == 1 for letter in letters) else " "
+
+
+class TransitionTable:
+    """Represents DFA transitions as a flat array over interned states and letters.
+
+    States and letters are numbered by their positions in `states` and `letters`.
+    The target of the transition from state `s` by letter `a` is stored at
+    `targets[s * width + a]`, missing transitions are marked with `DEAD`.
+    Words over letters longer than one character are written with spaces
+    between letters.
+    """
+
+    def __init__(self, states: Iterable[str], letters: Iterable[str],
+                 transitions: Dict[Tuple[str, str], str]):
+        self.states = sorted(states)
+        self.letters = list(letters)
+        self.state_ids = {state: idx for idx, state in enumerate(self.states)}
+        self.letter_ids = {letter: idx for idx, letter in enumerate(self.letters)}
+        self.width = len(self.letters)
+        self.separator = word_separator(self.letters)
+        self.targets = array("i", [DEAD]) * (len(self.states) * self.width)
+
+        for (in_state, letter), out_state in transitions.items():
+            in_id = self.state_ids.get(in_state, DEAD)
+            out_id = self.state_ids.get(out_state, DEAD)
+            if in_id != DEAD:
+                self.targets[in_id * self.width + self.letter_ids[letter]] = out_id
+
+    def append_letter(self, word: str, letter: str) -> str:
+        """Returns the word followed by the letter."""
+        return word + self.separator + letter if word else letter
+
+    def split_word(self, word: Sequence[str]) -> Sequence[str]:
+        """Returns the letters of the word given as a string or as letters."""
+        if isinstance(word, str) and self.separator and word:
+            return word.split(self.separator)
+        return word
+
+    @classmethod
+    def from_columns(
+        cls, states: List[str], letters: List[str], columns: List[array]
+    ) -> "TransitionTable":
+        """Builds the table from arrays of targets by each letter.
+
+        `columns[a][s]` is the id of the target of the transition from the state
+        `states[s]` by the letter `letters[a]`. Ids of states are kept, letters
+        are sorted.
+        """
+        table = cls((), sorted(letters), {})
+        table.states = states
+        table.state_ids = {state: idx for idx, state in enumerate(states)}
+        table.targets = array("i", [DEAD]) * (len(states) * table.width)
+        for letter, column in zip(letters, columns):
+            letter_id = table.letter_ids[letter]
+            table.targets[letter_id :: table.width] = column
+        return table
+
+    def restricted_to(self, states: Set[str]) -> "TransitionTable":
+        """Returns the table of transitions between the given states only."""
+        table = TransitionTable((), self.letters, {})
+        table.states = sorted(states)
+        table.state_ids = {state: idx for idx, state in enumerate(table.states)}
+        # The last item maps DEAD, which is -1, to itself.
+        new_ids = array("i", [DEAD]) * (len(self.states) + 1)
+        for state, idx in table.state_ids.items():
+            new_ids[self.state_ids[state]] = idx
+
+        width = self.width
+        table.targets = array("i", [DEAD]) * (len(table.states) * width)
+        for idx, state in enumerate(table.states):
+            start = self.state_ids[state] * width
+            table.targets[idx * width : (idx + 1) * width] = array(
+                "i", [new_ids[target] for target in self.targets[start : start + width]]
+            )
+        return table
+
+    def add_state(self, state: str) -> int:
+        """Appends a state without transitions and returns its id."""
+        self.state_ids[state] = len(self.states)
+        self.states.append(state)
+        self.targets.extend(array("i", [DEAD]) * self.width)
+        return self.state_ids[state]
+
+    def set_target(self, state_id: int, letter_id: int, target_id: int) -> None:
+        """Sets the target of the transition, `DEAD` removes the transition."""
+        self.targets[state_id * self.width + letter_id] = target_id
+
+    def step(self, state_id: int, letter_id: int) -> int:
+        """Returns the id of the state reached from the given one by one letter."""
+        return self.targets[state_id * self.width + letter_id]
+
+    def apply(self, transformation: Sequence[int], letter_id: int) -> Tuple[int, ...]:
+        """Returns the transformation followed by the letter."""
+        targets, width = self.targets, self.width
+        return tuple(
+            DEAD if state_id == DEAD else targets[state_id * width + letter_id]
+            for state_id in transformation
+        )
+
+    def run(self, state_id: int, word: Iterable[str]) -> int:
+        """Returns the id of the state reached from the given one by the word."""
+        targets, width, letter_ids = self.targets, self.width, self.letter_ids
+        for letter in word:
+            letter_id = letter_ids.get(letter)
+            if state_id == DEAD or letter_id is None:
+                return DEAD
+            state_id = targets[state_id * width + letter_id]
+        return state_id
+
+    def run_many(self, state_id: int, words: Iterable[Sequence[str]]) -> List[int]:
+        """Returns the ids of states reached from the given one by each word.
+
+        Words are given as strings or as sequences of letters.
+        """
+        run, split_word = self.run, self.split_word
+        return [run(state_id, split_word(word)) for word in words]
+
+    def simulate(self, state_ids: Iterable[int], word: Iterable[str]) -> Set[int]:
+        """Returns the ids of states reached from the given ones by the word.
+
+        The whole set is pushed through the word at once, states that meet
+        on the way are simulated only once. `DEAD` is in the result if some
+        of the states have no path by the word.
+        """
+        targets, width, letter_ids = self.targets, self.width, self.letter_ids
+        current = set(state_ids)
+        for letter in word:
+            letter_id = letter_ids.get(letter)
+            if letter_id is None:
+                return {DEAD} if current else set()
+            current = {
+                DEAD if state_id == DEAD else targets[state_id * width + letter_id]
+                for state_id in current
+            }
+        return current
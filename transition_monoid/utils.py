@@ -1,5 +1,7 @@
 from tabulate import tabulate
 
+from transition_table import DEAD
+
 
 def pretty_print(*text, tabs=0, sep=" "):
     """Prints text with the specified number of tabs and given separator."""
@@ -7,9 +9,31 @@ def pretty_print(*text, tabs=0, sep=" "):
     print(*text, sep=sep)
 
 
+def print_found(found):
+    """Prints a class or a rewriting rule found while building a monoid."""
+    if isinstance(found, tuple):
+        print(f"Rewriting rule: {found[0]} -> {found[1]}")
+    else:
+        print(f"Equivalence class: {found.word} := {found.pairs}")
+
+
+def print_statistics(statistics):
+    """Prints statistics of building a monoid."""
+    print(
+        "\nMonoid is complete." if statistics.complete
+        else f"\nBuilding stopped by the {statistics.stopped_by} limit.",
+    )
+    pretty_print(f"Classes: {statistics.elements}", tabs=1)
+    pretty_print(f"Rewriting rules: {statistics.rules}", tabs=1)
+    pretty_print(f"Longest class word: {statistics.word_length}", tabs=1)
+    pretty_print(f"Seconds: {statistics.seconds:.3f}", tabs=1)
+
+
 def print_monoid_details(monoid, dfa):
     """Prints basic information about DFA acceptance of monoid classes combinations."""
     classes = monoid.classes
+    table = monoid.multiplication_table()
+    accepting = monoid.accepting(dfa)
 
     print("Rewriting rules:")
     for left, right in monoid.rewriting_rules.items():
@@ -21,18 +45,20 @@ def print_monoid_details(monoid, dfa):
 
     print("\nWords that are accepted by the DFA:")
     pretty_print(
-        *[cls.word for cls in classes if dfa.accepts(cls.word)], tabs=1, sep=", "
+        *[cls.word for idx, cls in enumerate(classes) if accepting[idx]],
+        tabs=1,
+        sep=", ",
     )
 
     print("\nInformation for each class:")
-    for cls in classes:
+    for idx, cls in enumerate(classes):
         pretty_print(f'Class w = "{cls.word}":', tabs=1)
         pretty_print('Equivalence classes "v" such that dfa accepts "vw":', tabs=2)
         pretty_print(
             *[
                 add_cls.word
-                for add_cls in classes
-                if dfa.accepts(add_cls.word + cls.word)
+                for add_idx, add_cls in enumerate(classes)
+                if accepting[table[add_idx][idx]]
             ],
             tabs=3,
             sep=", ",
@@ -41,8 +67,8 @@ def print_monoid_details(monoid, dfa):
         pretty_print(
             *[
                 add_cls.word
-                for add_cls in classes
-                if dfa.accepts(cls.word + add_cls.word)
+                for add_idx, add_cls in enumerate(classes)
+                if accepting[table[idx][add_idx]]
             ],
             tabs=3,
             sep=", ",
@@ -53,15 +79,15 @@ def print_monoid_details(monoid, dfa):
         pretty_print(
             *[
                 (add1_cls.word, add2_cls.word)
-                for add1_cls in classes
-                for add2_cls in classes
-                if dfa.accepts(add1_cls.word + cls.word + add2_cls.word)
+                for add1_idx, add1_cls in enumerate(classes)
+                for add2_idx, add2_cls in enumerate(classes)
+                if accepting[table[table[add1_idx][idx]][add2_idx]]
             ],
             tabs=3,
             sep=", ",
         )
 
-        sync_state = dfa.sync_from_word(cls.word)
+        sync_state = cls.synchronizing_state()
         pretty_print(
             f"Synchronizes to state: {sync_state}"
             if sync_state
@@ -73,42 +99,37 @@ def print_monoid_details(monoid, dfa):
 
 def print_myhill_nerode_details(classes, dfa):
     """Prints information about Myhill-Nerode equivalence classes if DFA is minimal."""
+    minimal_dfa, _ = dfa.minimize()
+    states = dfa.useful_table.state_ids
+    final_ids = {states[state] for state in dfa.final_states if state in states}
+    initial_id = states.get(dfa.initial_state, DEAD)
+
+    equivs = {}
+    if initial_id != DEAD:
+        for cls in classes:
+            state_id = cls.transformation[initial_id]
+            if state_id != DEAD and state_id not in equivs:
+                equivs[state_id] = cls
 
-    def is_equal(cls1, cls2):
-        words1 = {
-            add_cls.word for add_cls in classes if dfa.accepts(cls1.word + add_cls.word)
-        }
-        words2 = {
-            add_cls.word for add_cls in classes if dfa.accepts(cls2.word + add_cls.word)
-        }
-        return words1 == words2
-
-    equivs = [classes[0]]
-
-    for cls in classes[1:]:
-        if (
-            not any(is_equal(cls, eq) for eq in equivs)
-            and dfa.reach_from_state(dfa.initial_state, cls.word) is not None
-        ):
-            equivs.append(cls)
-
-    if len(equivs) == len(dfa.useful_states):
+    if len(minimal_dfa.states) == len(dfa.useful_states):
         table = {"suffixes": []}
 
         for cls in classes:
             table["suffixes"].append(cls.word)
             table[cls.word] = []
 
-        for suffix in table["suffixes"]:
-            for cls in equivs:
-                table[cls.word].append("+" if dfa.accepts(cls.word + suffix) else "-")
+        for suffix_cls in classes:
+            for state_id, cls in equivs.items():
+                table[cls.word].append(
+                    "+" if suffix_cls.transformation[state_id] in final_ids else "-"
+                )
 
         print("Myhill-Nerode equivalence classes:")
         print(
             tabulate(
-                [table[cls.word] for cls in equivs],
+                [table[cls.word] for cls in equivs.values()],
                 headers=table["suffixes"],
-                showindex=list(map(lambda x: x.word, equivs)),
+                showindex=[cls.word for cls in equivs.values()],
                 tablefmt="pretty",
             )
         )
@@ -117,6 +138,46 @@ def print_myhill_nerode_details(classes, dfa):
             (
                 "DFA is not minimal. "
                 f"It has {len(dfa.useful_states)} states while "
-                f"equivalent minimal DFA has {len(equivs)} states."
+                f"equivalent minimal DFA has {len(minimal_dfa.states)} states."
             )
         )
+
+
+def print_sync_word_details(dfa):
+    """Prints the shortest synchronizing word of the DFA if there is one."""
+    letters = dfa.shortest_synchronizing_word()
+    if letters is None:
+        print("DFA is not synchronizing.")
+    else:
+        word = dfa.useful_table.separator.join(letters)
+        print(
+            f'Shortest synchronizing word: "{word}" '
+            f"(synchronizes to state {dfa.sync_from_word(letters)})"
+        )
+
+
+def print_green_details(green, star_free_known):
+    """Prints Green's relations of a monoid and whether it is aperiodic."""
+    def words(cls):
+        return ", ".join(word or "ε" for word in cls)
+
+    if green.aperiodic:
+        print("\nMonoid is aperiodic, so the language is star-free.")
+    elif star_free_known:
+        print("\nMonoid is not aperiodic, so the language is not star-free.")
+    else:
+        print(
+            "\nMonoid is not aperiodic. The DFA is not minimal, so the language "
+            "may still be star-free."
+        )
+
+    print("\nIdempotents:")
+    pretty_print(words(green.idempotents), tabs=1)
+    for name, classes in (
+        ("R", green.r_classes),
+        ("L", green.l_classes),
+        ("J", green.j_classes),
+    ):
+        print(f"\n{name}-classes:")
+        for cls in classes:
+            pretty_print(f"{{{words(cls)}}}", tabs=1)